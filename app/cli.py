@@ -0,0 +1,104 @@
+"""
+Maintenance commands.
+
+Run with the same environment as the API, e.g.:
+
+    python -m app.cli rebuild-summary --start-date 2024-01-01
+"""
+import argparse
+import asyncio
+from datetime import date
+from app.config import settings
+from app.database import async_session_maker, engine
+
+
+async def rebuild_summary(args: argparse.Namespace):
+    from app.services.summary_service import summary_service
+    async with async_session_maker() as db:
+        written = await summary_service.rebuild(db, args.start_date, args.end_date)
+    print(f"✅ Rebuilt attendance summary ({written} rows)")
+
+
+async def rebuild_calendar(args: argparse.Namespace):
+    from app.services.calendar_service import calendar_service
+    async with async_session_maker() as db:
+        written = await calendar_service.rebuild(db, args.start_date, args.end_date)
+    print(f"✅ Rebuilt attendance calendar bitmaps ({written} rows)")
+
+
+async def rebuild_departments(args: argparse.Namespace):
+    from app.services.department_service import department_service
+    async with async_session_maker() as db:
+        written = await department_service.rebuild(db)
+    print(f"✅ Rebuilt department headcounts ({written} departments)")
+
+
+async def partition_attendance(args: argparse.Namespace):
+    from app.partitioning import convert_to_partitioned, ensure_partitions, is_partitioned
+    async with engine.begin() as conn:
+        if await is_partitioned(conn):
+            created = await ensure_partitions(conn, settings.attendance_partitions_ahead)
+        else:
+            created = await convert_to_partitioned(conn)
+    print(f"✅ attendance is partitioned ({len(created)} partitions created)")
+
+
+async def archive_attendance(args: argparse.Namespace):
+    from app.services.archive_service import archive_service
+    archived = await archive_service.archive(engine, args.before)
+    for month in archived:
+        print(f"✅ Archived {month.month:%Y-%m} ({month.rows} rows) to {month.path}")
+    if not archived:
+        print("Nothing to archive")
+
+
+def _add_date_range(parser: argparse.ArgumentParser):
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First day (YYYY-MM-DD), default: earliest")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last day (YYYY-MM-DD), default: latest")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="HRMS Lite maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild = commands.add_parser("rebuild-summary", help="Recompute the daily department attendance summary")
+    _add_date_range(rebuild)
+    rebuild.set_defaults(handler=rebuild_summary)
+    
+    rebuild = commands.add_parser("rebuild-calendar", help="Recompute the monthly attendance bitmaps")
+    _add_date_range(rebuild)
+    rebuild.set_defaults(handler=rebuild_calendar)
+    
+    rebuild = commands.add_parser("rebuild-departments", help="Recompute the department headcounts")
+    rebuild.set_defaults(handler=rebuild_departments)
+    
+    partition = commands.add_parser(
+        "partition-attendance",
+        help="Convert attendance to monthly partitions (locks the table) or create upcoming partitions"
+    )
+    partition.set_defaults(handler=partition_attendance)
+    
+    archive = commands.add_parser("archive-attendance", help="Move old months of attendance to ARCHIVE_DIR")
+    archive.add_argument(
+        "--before", type=date.fromisoformat,
+        help="Archive whole months ending before this day (YYYY-MM-DD), default: ARCHIVE_AFTER_DAYS ago"
+    )
+    archive.set_defaults(handler=archive_attendance)
+    
+    return parser
+
+
+async def _run(args: argparse.Namespace):
+    try:
+        await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,326 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+import asyncio
+import itertools
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import declarative_base, Session
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from app.config import settings
 
-# Create async engine for PostgreSQL
-# Note: Special configuration for Supabase Session Pooler (pgbouncer in transaction mode)
-# - statement_cache_size=0: Disables prepared statement caching in asyncpg
-# - poolclass=NullPool: Disables SQLAlchemy connection pooling (pgbouncer handles this)
-engine = create_async_engine(
-    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=False,
-    poolclass=NullPool,
-    connect_args={
-        "statement_cache_size": 0,
-        "server_settings": {"jit": "off"}
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Checkout counters for the in-process connection pool."""
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return entry
+
+
+# Postgres SQLSTATE codes handled by the services
+INVALID_STATEMENT_NAME = "26000"
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+CHECK_VIOLATION = "23514"
+
+_statement_counter = itertools.count(1)
+
+
+def _prepared_statement_name() -> str:
+    """Deterministic statement names, unique per worker process."""
+    return f"hrms_{os.getpid()}_{next(_statement_counter)}"
+
+
+def _pool_options() -> Dict[str, Any]:
+    """Keyword arguments for the in-process connection pool."""
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
     }
-)
+
+
+def _engine_options() -> Dict[str, Any]:
+    """Build create_async_engine() keyword arguments for the configured pool mode."""
+    if settings.db_pool_mode == "internal":
+        # Direct Postgres: keep warm connections and cache prepared statements per connection
+        return {
+            **_pool_options(),
+            "connect_args": {
+                "statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+                "server_settings": {"jit": "off"}
+            }
+        }
+    
+    if settings.db_prepared_statements:
+        # Transaction-mode pgbouncer with protocol-level prepared statement support:
+        # keep client connections to the pooler open so each one plans a hot query
+        # once, and name statements so they never collide across clients
+        return {
+            **_pool_options(),
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_name_func": _prepared_statement_name,
+                "server_settings": {"jit": "off"}
+            }
+        }
+    
+    # Note: Special configuration for Supabase Session Pooler (pgbouncer in transaction mode)
+    # - statement_cache_size=0: Disables prepared statement caching in asyncpg
+    # - poolclass=NullPool: Disables SQLAlchemy connection pooling (pgbouncer handles this)
+    return {
+        "poolclass": NullPool,
+        "connect_args": {
+            "statement_cache_size": 0,
+            "server_settings": {"jit": "off"}
+        }
+    }
+
+
+def get_sqlstate(exc: BaseException) -> Optional[str]:
+    """Return the Postgres SQLSTATE carried by a DBAPI error, if any."""
+    return getattr(getattr(exc, "orig", None), "sqlstate", None)
+
+
+def _drop_lost_prepared_statements(context):
+    """Forget cached statements on a connection whose server no longer has them."""
+    if context.connection is None:
+        return
+    if getattr(context.original_exception, "sqlstate", None) != INVALID_STATEMENT_NAME:
+        return
+    dbapi_connection = context.connection.connection.dbapi_connection
+    cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+    if cache is not None:
+        cache.clear()
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    """Create an asyncpg engine for a postgresql:// URL."""
+    async_engine = create_async_engine(
+        url.replace("postgresql://", "postgresql+asyncpg://"),
+        echo=False,
+        **_engine_options()
+    )
+    event.listen(async_engine.sync_engine, "handle_error", _drop_lost_prepared_statements)
+    return async_engine
+
+
+def _read_engine(async_engine: AsyncEngine) -> Engine:
+    """Variant of an engine whose connections run reads per DB_READ_MODE."""
+    if settings.db_read_mode == "read_only":
+        return async_engine.sync_engine.execution_options(
+            postgresql_readonly=True,
+            postgresql_deferrable=True
+        )
+    return async_engine.sync_engine.execution_options(isolation_level="AUTOCOMMIT")
+
+
+# Create async engine for PostgreSQL
+engine = _create_engine(settings.database_url)
+primary_read_engine = _read_engine(engine)
+# Server-side cursors need a transaction, so streams never run in autocommit
+primary_stream_engine = engine.execution_options(postgresql_readonly=True)
+
+
+# Replication lag in seconds; zero on a primary or a fully caught-up standby
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    """A read replica engine and its last observed replication lag."""
+    
+    def __init__(self, url: str):
+        self.engine = _create_engine(url)
+        self.read_engine = _read_engine(self.engine)
+        self.stream_engine = self.engine.execution_options(postgresql_readonly=True)
+        self.lag: Optional[float] = None
+        self.healthy = False
+    
+    @property
+    def name(self) -> str:
+        url = self.engine.url
+        return f"{url.host}:{url.port or 5432}/{url.database}"
+
+
+class ReplicaSet:
+    """
+    Round-robin load balancing across read replicas.
+    
+    Replicas are probed in the background; one that is unreachable or lags
+    the primary by more than REPLICA_MAX_LAG_SECONDS is skipped until it
+    catches up. With no healthy replica, reads fall back to the primary.
+    """
+    
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        self._monitor: Optional[asyncio.Task] = None
+    
+    def choose(self) -> Optional[Replica]:
+        """Pick the next healthy replica, or None to use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+    
+    async def refresh(self):
+        """Measure replication lag on every replica."""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    replica.lag = float(await conn.scalar(REPLICA_LAG_SQL))
+                replica.healthy = replica.lag <= settings.replica_max_lag_seconds
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Read replica {replica.name} unavailable: {e}")
+                replica.lag = None
+                replica.healthy = False
+    
+    async def _run_monitor(self):
+        while True:
+            await asyncio.sleep(settings.replica_check_interval)
+            await self.refresh()
+    
+    async def start(self):
+        """Probe replicas once and keep probing them in the background."""
+        if not self.replicas:
+            return
+        await self.refresh()
+        self._monitor = asyncio.create_task(self._run_monitor())
+    
+    async def stop(self):
+        """Stop probing and close replica connections."""
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+    
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {"replica": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag}
+            for replica in self.replicas
+        ]
+
+
+replicas = ReplicaSet(settings.get_replica_urls_list())
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica and everything else to the primary.
+    
+    Once a session has written, or a service has called use_primary(), it
+    stays on the primary so it reads its own writes. The read target is only
+    chosen when the first statement runs, so requests that never touch the
+    database never check out a connection.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["use_primary"] = True
+        if self.info.get("use_primary"):
+            return engine.sync_engine
+        if "read_engine" not in self.info:
+            replica = replicas.choose()
+            self.info["read_engine"] = replica.read_engine if replica else primary_read_engine
+        return self.info["read_engine"]
+
+
+def streaming_session() -> AsyncSession:
+    """
+    Session for long reads through a server-side cursor.
+    
+    Used by streaming responses, which outlive the request's dependencies
+    and so must own their session. Prefers a healthy replica.
+    """
+    replica = replicas.choose()
+    return AsyncSession(
+        bind=replica.stream_engine if replica else primary_stream_engine,
+        expire_on_commit=False
+    )
+
+
+def use_primary(db: AsyncSession):
+    """Route the rest of this session's reads to the primary (read-your-writes)."""
+    db.info["use_primary"] = True
+
+
+def reads_from_replica(db: AsyncSession) -> bool:
+    """True if this session's reads so far were served by a replica."""
+    read_engine = db.info.get("read_engine")
+    return not db.info.get("use_primary") and read_engine is not None and read_engine is not primary_read_engine
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_writes(session):
+    session.info.pop("has_writes", None)
+
 
 # Create session factory
 async_session_maker = async_sessionmaker(
@@ -24,38 +329,131 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Session factory for read-mostly requests
+read_session_maker = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
-async def get_db():
-    """Dependency to get database session."""
-    async with async_session_maker() as session:
+@asynccontextmanager
+async def _session_scope(session_maker):
+    """
+    Yield a request session that only pays for the round-trips it needs.
+    
+    A connection is checked out when the first statement runs. COMMIT is
+    only sent if the request wrote something a service has not already
+    committed (including objects added but never flushed), and ROLLBACK
+    only if a transaction is actually open.
+    """
+    async with session_maker() as session:
         try:
             yield session
-            await session.commit()
+            if session.info.get("has_writes") or session.new or session.dirty or session.deleted:
+                await session.commit()
         except Exception:
-            await session.rollback()
+            if session.in_transaction():
+                await session.rollback()
             raise
         finally:
             await session.close()
 
 
+async def get_db():
+    """Dependency to get database session."""
+    async with _session_scope(async_session_maker) as session:
+        yield session
+
+
+async def get_read_db():
+    """Dependency to get a read session, served by a replica when one is configured."""
+    async with _session_scope(read_session_maker) as session:
+        yield session
+
+
+async def execute_prepared(db: AsyncSession, stmt):
+    """
+    Execute a hot statement, re-preparing it once if the server lost it.
+    
+    Behind a transaction-mode pooler a request can land on a backend that has
+    never seen the connection's cached statement. The failed statement aborts
+    the transaction, so this is only safe for reads issued before the unit of
+    work has written anything.
+    
+    Args:
+        db: Database session
+        stmt: Statement to execute
+        
+    Returns:
+        Statement result
+    """
+    try:
+        return await db.execute(stmt)
+    except DBAPIError as e:
+        # Flushed or Core-level writes would be rolled back along with it
+        if (
+            get_sqlstate(e) != INVALID_STATEMENT_NAME
+            or db.info.get("has_writes") or db.new or db.dirty or db.deleted
+        ):
+            raise
+        await db.rollback()
+        return await db.execute(stmt)
+
+
+def get_pool_status() -> Dict[str, Any]:
+    """
+    Report connection pool occupancy and checkout wait statistics.
+    
+    Returns:
+        Pool mode plus size/occupancy and wait counters for the internal pool
+    """
+    status = {"mode": settings.db_pool_mode}
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.db_max_overflow,
+            **pool_stats.as_dict()
+        })
+    return status
+
+
 async def init_db():
     """Initialize database tables."""
     try:
         async with engine.begin() as conn:
             # Import models here so they register with Base.metadata
-            from app.models import employee, attendance
+            from app.models import employee, attendance, version, summary, calendar, department
+            from app.migrations import run_migrations
+            from app.partitioning import create_partitioned_attendance
+            if settings.attendance_partitioning:
+                # create_all() would create a plain attendance table, so make the
+                # partitioned one first (after employees, which it references)
+                tables = [table for table in Base.metadata.sorted_tables if table.name != "attendance"]
+                await conn.run_sync(Base.metadata.create_all, tables=tables)
+                if await create_partitioned_attendance(conn):
+                    print("✅ Created partitioned attendance table")
             await conn.run_sync(Base.metadata.create_all)
+            for version in await run_migrations(conn):
+                print(f"✅ Applied migration {version}")
         print(f"✅ Database initialized successfully")
     except Exception as e:
         print(f"⚠️  Database initialization failed: {e}")
         print(f"⚠️  Please check your DATABASE_URL in .env file")
         print(f"⚠️  Make sure you're using the Session Pooler (port 6543) from Supabase")
+    
+    await replicas.start()
 
 
 async def close_db():
     """Close database connection."""
+    await replicas.stop()
     await engine.dispose()
     print("Database connection closed")
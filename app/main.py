@@ -2,10 +2,18 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from app.config import settings
 from app.database import init_db, close_db
-from app.routes import employees, attendance
+from app.services.employee_index import employee_index
+from app.services.employee_search import employee_search_index
+from app.services.employee_service import employee_service
+from app.services.attendance_writer import attendance_writer
+from app.partitioning import partition_maintainer
+from app.routes import employees, attendance, departments, health
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.idempotency import IdempotencyMiddleware, REPLAYED_HEADER, idempotency_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,12 +29,24 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting HRMS Lite API...")
     await init_db()
+    await partition_maintainer.start()
+    await employee_index.start()
+    await employee_search_index.start()
+    await attendance_writer.start()
+    # Finish purges interrupted by a restart
+    purge = asyncio.create_task(employee_service.purge_deleted())
     logger.info("✅ Application startup complete")
     
     yield
     
     # Shutdown
     logger.info("👋 Shutting down HRMS Lite API...")
+    purge.cancel()
+    # Write queued marks before the database goes away
+    await attendance_writer.stop()
+    await employee_search_index.stop()
+    await employee_index.stop()
+    await partition_maintainer.stop()
     await close_db()
     logger.info("✅ Application shutdown complete")
 
@@ -41,6 +61,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Replay retried POSTs that carry an Idempotency-Key (inside CORS, so
+# replayed responses get CORS headers too)
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -48,12 +72,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified", REPLAYED_HEADER],
 )
 
 
 # Register routers
 app.include_router(employees.router)
 app.include_router(attendance.router)
+app.include_router(departments.router)
+app.include_router(health.router)
 
 
 # Health check endpoint
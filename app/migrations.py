@@ -0,0 +1,501 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all() only creates missing tables, so changes to tables
+that already exist are applied here, in order, once per database. Each
+migration is a list of SQL statements run in the init_db() transaction and
+recorded in the schema_migrations table.
+"""
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Serializes migrations when several workers start at once
+MIGRATION_LOCK_ID = 7_140_925_001
+
+# Rows per version counter (see 0012_sharded_version_counters)
+VERSION_SHARDS = 16
+
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("0001_attendance_unique_employee_date", [
+        # Keep only the most recent mark per employee and day
+        """
+        DELETE FROM attendance WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY employee_id, date
+                    ORDER BY created_at DESC NULLS LAST, id DESC
+                ) AS rn
+                FROM attendance
+            ) ranked
+            WHERE rn > 1
+        )
+        """,
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_attendance_employee_date'
+            ) THEN
+                ALTER TABLE attendance
+                    ADD CONSTRAINT uq_attendance_employee_date UNIQUE (employee_id, date);
+            END IF;
+        END $$
+        """,
+        # The unique index leads with employee_id, so the single-column index is redundant
+        "DROP INDEX IF EXISTS ix_attendance_employee_id",
+    ]),
+    ("0002_employee_id_sequence", [
+        "CREATE SEQUENCE IF NOT EXISTS employee_id_seq",
+        # Continue after the highest EMPnnn issued so far
+        """
+        SELECT setval(
+            'employee_id_seq',
+            COALESCE(
+                (SELECT MAX(substring(employee_id FROM 4)::bigint)
+                 FROM employees WHERE employee_id ~ '^EMP[0-9]+$'),
+                0
+            ) + 1,
+            false
+        )
+        """,
+    ]),
+    ("0003_keyset_pagination_indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_attendance_date_id ON attendance (date, id)",
+        # Superseded by ix_attendance_date_id, which leads with date
+        "DROP INDEX IF EXISTS ix_attendance_date",
+        "CREATE INDEX IF NOT EXISTS ix_employees_created_at_employee_id ON employees (created_at, employee_id)",
+    ]),
+    ("0004_table_version_counters", [
+        # Counters live in the writing transaction, so a reader never sees a
+        # new version before the rows it describes are visible
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+                SET version = table_versions.version + 1, updated_at = EXCLUDED.updated_at;
+            RETURN NULL;
+        END $$
+        """,
+        # Dates are locked in order so concurrent multi-day writes cannot deadlock
+        """
+        CREATE OR REPLACE FUNCTION bump_attendance_versions() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changed date[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(DISTINCT date ORDER BY date) INTO changed FROM new_rows;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT array_agg(DISTINCT date ORDER BY date) INTO changed
+                FROM (SELECT date FROM old_rows UNION ALL SELECT date FROM new_rows) AS touched;
+            ELSE
+                SELECT array_agg(DISTINCT date ORDER BY date) INTO changed FROM old_rows;
+            END IF;
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+            
+            INSERT INTO attendance_date_versions (date, version, updated_at)
+            SELECT changed_date, 1, now() FROM unnest(changed) AS changed_date
+            ON CONFLICT (date) DO UPDATE
+                SET version = attendance_date_versions.version + 1, updated_at = EXCLUDED.updated_at;
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+                SET version = table_versions.version + 1, updated_at = EXCLUDED.updated_at;
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS employees_version ON employees",
+        """
+        CREATE TRIGGER employees_version
+        AFTER INSERT OR UPDATE OR DELETE ON employees
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_version_insert ON attendance",
+        """
+        CREATE TRIGGER attendance_version_insert
+        AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_attendance_versions()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_version_update ON attendance",
+        """
+        CREATE TRIGGER attendance_version_update
+        AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_attendance_versions()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_version_delete ON attendance",
+        """
+        CREATE TRIGGER attendance_version_delete
+        AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_attendance_versions()
+        """,
+        """
+        INSERT INTO table_versions (table_name, version, updated_at)
+        VALUES ('employees', 0, now()), ('attendance', 0, now())
+        ON CONFLICT DO NOTHING
+        """,
+    ]),
+    ("0005_attendance_daily_summary", [
+        # Applies the net change of each statement to the per-day, per-department
+        # counts. Rows are attributed to the employee's current department.
+        """
+        CREATE OR REPLACE FUNCTION apply_attendance_summary() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changes text;
+        BEGIN
+            changes := CASE TG_OP
+                WHEN 'INSERT' THEN
+                    'SELECT employee_id, date, status, 1 AS sign FROM new_rows'
+                WHEN 'DELETE' THEN
+                    'SELECT employee_id, date, status, -1 AS sign FROM old_rows'
+                ELSE
+                    'SELECT employee_id, date, status, 1 AS sign FROM new_rows
+                     UNION ALL SELECT employee_id, date, status, -1 FROM old_rows'
+            END;
+            EXECUTE format($sql$
+                INSERT INTO attendance_daily_summary AS s (date, department, present, absent)
+                SELECT c.date, e.department,
+                       COALESCE(sum(c.sign) FILTER (WHERE c.status = 'Present'), 0),
+                       COALESCE(sum(c.sign) FILTER (WHERE c.status = 'Absent'), 0)
+                FROM (%s) AS c
+                JOIN employees e ON e.employee_id = c.employee_id
+                GROUP BY c.date, e.department
+                ORDER BY c.date, e.department
+                ON CONFLICT (date, department) DO UPDATE
+                    SET present = s.present + EXCLUDED.present,
+                        absent = s.absent + EXCLUDED.absent
+            $sql$, changes);
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS attendance_summary_insert ON attendance",
+        """
+        CREATE TRIGGER attendance_summary_insert
+        AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_attendance_summary()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_summary_update ON attendance",
+        """
+        CREATE TRIGGER attendance_summary_update
+        AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_attendance_summary()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_summary_delete ON attendance",
+        """
+        CREATE TRIGGER attendance_summary_delete
+        AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_attendance_summary()
+        """,
+        # Backfill from existing records
+        """
+        INSERT INTO attendance_daily_summary (date, department, present, absent)
+        SELECT a.date, e.department,
+               count(*) FILTER (WHERE a.status = 'Present'),
+               count(*) FILTER (WHERE a.status = 'Absent')
+        FROM attendance a
+        JOIN employees e ON e.employee_id = a.employee_id
+        GROUP BY a.date, e.department
+        ON CONFLICT (date, department) DO NOTHING
+        """,
+    ]),
+    ("0006_attendance_month_bitmaps", [
+        """
+        CREATE OR REPLACE FUNCTION attendance_day_bit(d date) RETURNS integer
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT 1 << (extract(day FROM d)::integer - 1)
+        $$
+        """,
+        # Clears the bits of removed marks, then sets the bits of new ones;
+        # an update does both
+        """
+        CREATE OR REPLACE FUNCTION apply_attendance_bitmaps() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE attendance_month_bitmaps AS b
+                SET marked = b.marked & ~c.days, present = b.present & ~c.days
+                FROM (
+                    SELECT employee_id, date_trunc('month', date)::date AS month,
+                           bit_or(attendance_day_bit(date)) AS days
+                    FROM old_rows
+                    GROUP BY 1, 2
+                ) AS c
+                WHERE b.employee_id = c.employee_id AND b.month = c.month;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO attendance_month_bitmaps AS b (employee_id, month, marked, present)
+                SELECT employee_id, date_trunc('month', date)::date,
+                       bit_or(attendance_day_bit(date)),
+                       COALESCE(bit_or(attendance_day_bit(date)) FILTER (WHERE status = 'Present'), 0)
+                FROM new_rows
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+                ON CONFLICT (employee_id, month) DO UPDATE
+                    SET marked = b.marked | EXCLUDED.marked,
+                        present = (b.present & ~EXCLUDED.marked) | EXCLUDED.present;
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS attendance_bitmaps_insert ON attendance",
+        """
+        CREATE TRIGGER attendance_bitmaps_insert
+        AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_attendance_bitmaps()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_bitmaps_update ON attendance",
+        """
+        CREATE TRIGGER attendance_bitmaps_update
+        AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_attendance_bitmaps()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_bitmaps_delete ON attendance",
+        """
+        CREATE TRIGGER attendance_bitmaps_delete
+        AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_attendance_bitmaps()
+        """,
+        # Backfill from existing records
+        """
+        INSERT INTO attendance_month_bitmaps (employee_id, month, marked, present)
+        SELECT employee_id, date_trunc('month', date)::date,
+               bit_or(attendance_day_bit(date)),
+               COALESCE(bit_or(attendance_day_bit(date)) FILTER (WHERE status = 'Present'), 0)
+        FROM attendance
+        GROUP BY 1, 2
+        ON CONFLICT (employee_id, month) DO NOTHING
+        """,
+    ]),
+    ("0007_archive_keeps_rollups", [
+        # Archiving deletes rows with hrms.archiving set; the rollups keep
+        # counting them (table and day versions still move)
+        "DROP TRIGGER IF EXISTS attendance_summary_delete ON attendance",
+        """
+        CREATE TRIGGER attendance_summary_delete
+        AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+        WHEN (current_setting('hrms.archiving', true) IS DISTINCT FROM 'on')
+        EXECUTE FUNCTION apply_attendance_summary()
+        """,
+        "DROP TRIGGER IF EXISTS attendance_bitmaps_delete ON attendance",
+        """
+        CREATE TRIGGER attendance_bitmaps_delete
+        AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT
+        WHEN (current_setting('hrms.archiving', true) IS DISTINCT FROM 'on')
+        EXECUTE FUNCTION apply_attendance_bitmaps()
+        """,
+    ]),
+    ("0008_employee_tombstones", [
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ",
+        """
+        CREATE INDEX IF NOT EXISTS ix_employees_deleted_at ON employees (deleted_at)
+        WHERE deleted_at IS NOT NULL
+        """,
+    ]),
+    ("0009_employee_search", [
+        # Creating the extension needs privileges managed databases may not
+        # grant; search then falls back to the in-process index
+        """
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN insufficient_privilege OR undefined_file THEN
+            RAISE NOTICE 'pg_trgm unavailable, employee search indexes skipped';
+        END
+        $$
+        """,
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS ix_employees_full_name_trgm ON employees USING gin (full_name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS ix_employees_email_trgm ON employees USING gin (email gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS ix_employees_department_trgm ON employees USING gin (department gin_trgm_ops);
+            END IF;
+        END
+        $$
+        """,
+    ]),
+    ("0010_department_headcounts", [
+        # Equality lookups by department, in the employee list's page order
+        """
+        CREATE INDEX IF NOT EXISTS ix_employees_department_created_at_employee_id
+        ON employees (department, created_at, employee_id)
+        """,
+        # Applies the net change of each statement to the per-department
+        # headcounts. Tombstoned employees (deleted_at set) are not counted,
+        # so a soft delete decrements and purging the row changes nothing.
+        """
+        CREATE OR REPLACE FUNCTION apply_department_headcounts() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changes text;
+        BEGIN
+            changes := CASE TG_OP
+                WHEN 'INSERT' THEN
+                    'SELECT department, deleted_at, 1 AS sign FROM new_rows'
+                WHEN 'DELETE' THEN
+                    'SELECT department, deleted_at, -1 AS sign FROM old_rows'
+                ELSE
+                    'SELECT department, deleted_at, 1 AS sign FROM new_rows
+                     UNION ALL SELECT department, deleted_at, -1 FROM old_rows'
+            END;
+            EXECUTE format($sql$
+                INSERT INTO department_headcounts AS h (department, headcount)
+                SELECT c.department, sum(c.sign)
+                FROM (%s) AS c
+                WHERE c.deleted_at IS NULL
+                GROUP BY c.department
+                HAVING sum(c.sign) <> 0
+                ORDER BY c.department
+                ON CONFLICT (department) DO UPDATE
+                    SET headcount = h.headcount + EXCLUDED.headcount
+            $sql$, changes);
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS employees_headcount_insert ON employees",
+        """
+        CREATE TRIGGER employees_headcount_insert
+        AFTER INSERT ON employees REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_department_headcounts()
+        """,
+        "DROP TRIGGER IF EXISTS employees_headcount_update ON employees",
+        """
+        CREATE TRIGGER employees_headcount_update
+        AFTER UPDATE ON employees REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_department_headcounts()
+        """,
+        "DROP TRIGGER IF EXISTS employees_headcount_delete ON employees",
+        """
+        CREATE TRIGGER employees_headcount_delete
+        AFTER DELETE ON employees REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_department_headcounts()
+        """,
+        # Backfill from existing employees
+        """
+        INSERT INTO department_headcounts (department, headcount)
+        SELECT department, count(*)
+        FROM employees
+        WHERE deleted_at IS NULL
+        GROUP BY department
+        ON CONFLICT (department) DO NOTHING
+        """,
+    ]),
+    ("0011_attendance_marked_at", [
+        # Accept time of each mark; upserts skip marks older than the stored one
+        "ALTER TABLE attendance ADD COLUMN IF NOT EXISTS marked_at TIMESTAMPTZ",
+    ]),
+    ("0012_sharded_version_counters", [
+        # One counter row per table (and per day) made every write to the
+        # table queue on that row's lock until the writer committed. Each
+        # counter is now VERSION_SHARDS rows; a writer bumps the row of its
+        # backend's shard and readers sum them. The sum is still read in the
+        # reader's snapshot, so it never runs ahead of the rows it describes
+        # (a sequence would, and could pin a stale body to a new ETag).
+        "ALTER TABLE table_versions ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0",
+        "ALTER TABLE table_versions DROP CONSTRAINT IF EXISTS table_versions_pkey",
+        "ALTER TABLE table_versions ADD PRIMARY KEY (table_name, shard)",
+        "ALTER TABLE attendance_date_versions ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0",
+        "ALTER TABLE attendance_date_versions DROP CONSTRAINT IF EXISTS attendance_date_versions_pkey",
+        "ALTER TABLE attendance_date_versions ADD PRIMARY KEY (date, shard)",
+        f"""
+        CREATE OR REPLACE FUNCTION version_shard() RETURNS smallint
+        LANGUAGE sql STABLE AS $$ SELECT CAST(pg_backend_pid() % {VERSION_SHARDS} AS smallint) $$
+        """,
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, shard, version, updated_at)
+            VALUES (TG_TABLE_NAME, version_shard(), 1, now())
+            ON CONFLICT (table_name, shard) DO UPDATE
+                SET version = table_versions.version + 1, updated_at = EXCLUDED.updated_at;
+            RETURN NULL;
+        END $$
+        """,
+        # Dates are locked in order so concurrent multi-day writes on the
+        # same shard cannot deadlock
+        """
+        CREATE OR REPLACE FUNCTION bump_attendance_versions() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changed date[];
+            my_shard smallint := version_shard();
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(DISTINCT date ORDER BY date) INTO changed FROM new_rows;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT array_agg(DISTINCT date ORDER BY date) INTO changed
+                FROM (SELECT date FROM old_rows UNION ALL SELECT date FROM new_rows) AS touched;
+            ELSE
+                SELECT array_agg(DISTINCT date ORDER BY date) INTO changed FROM old_rows;
+            END IF;
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+            
+            INSERT INTO attendance_date_versions (date, shard, version, updated_at)
+            SELECT changed_date, my_shard, 1, now() FROM unnest(changed) AS changed_date
+            ON CONFLICT (date, shard) DO UPDATE
+                SET version = attendance_date_versions.version + 1, updated_at = EXCLUDED.updated_at;
+            INSERT INTO table_versions (table_name, shard, version, updated_at)
+            VALUES (TG_TABLE_NAME, my_shard, 1, now())
+            ON CONFLICT (table_name, shard) DO UPDATE
+                SET version = table_versions.version + 1, updated_at = EXCLUDED.updated_at;
+            RETURN NULL;
+        END $$
+        """,
+    ]),
+    ("0013_employee_email_unique_live", [
+        # Tombstoned employees keep their row until the purge; only live
+        # employees' emails have to be unique
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_employees_email_live ON employees (email)
+        WHERE deleted_at IS NULL
+        """,
+        "ALTER TABLE employees DROP CONSTRAINT IF EXISTS employees_email_key",
+    ]),
+]
+
+
+async def run_migrations(conn: AsyncConnection) -> List[str]:
+    """
+    Apply pending migrations.
+    
+    Args:
+        conn: Connection with an open transaction
+        
+    Returns:
+        Versions applied by this call
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+    await conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(100) PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    applied = set(result.scalars().all())
+    
+    newly_applied = []
+    for version, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        for statement in statements:
+            await conn.execute(text(statement))
+        await conn.execute(
+            text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+            {"version": version}
+        )
+        newly_applied.append(version)
+    
+    return newly_applied
@@ -1,23 +1,38 @@
-from sqlalchemy import Column, String, Date, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.sql import func
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, date
+from typing import List, Optional
 from app.database import Base
 
+ATTENDANCE_STATUSES = ("Present", "Absent")
+
 
 # SQLAlchemy Model
 class Attendance(Base):
-    """Attendance database model."""
+    """
+    Attendance database model.
+    
+    With ATTENDANCE_PARTITIONING the table is created by app.partitioning
+    instead, range-partitioned by month with primary key (id, date).
+    """
     __tablename__ = "attendance"
     
     id = Column(String(50), primary_key=True)
-    employee_id = Column(String(50), ForeignKey("employees.employee_id", ondelete="CASCADE"), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    employee_id = Column(String(50), ForeignKey("employees.employee_id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
     status = Column(String(10), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # When the mark was accepted; an upsert never replaces a newer mark, so
+    # marks flushed late from a worker's write-behind queue cannot undo a
+    # later correction
+    marked_at = Column(DateTime(timezone=True))
     
     __table_args__ = (
         CheckConstraint("status IN ('Present', 'Absent')", name='check_status'),
+        UniqueConstraint("employee_id", "date", name="uq_attendance_employee_date"),
+        # Keyset pagination order for list endpoints: (date, id) descending
+        Index("ix_attendance_date_id", "date", "id"),
     )
 
 
@@ -48,3 +63,55 @@ class AttendanceResponse(AttendanceBase):
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
+
+
+class AttendanceBulkCreate(BaseModel):
+    """Model for marking many attendance records at once."""
+    records: List[AttendanceCreate] = Field(..., min_length=1)
+
+
+class AttendanceDepartmentCreate(BaseModel):
+    """Model for marking a whole department for one date."""
+    department: str
+    date: date
+    status: str = "Present"
+    exclude: List[str] = []  # Employee IDs to leave untouched
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "department": "Engineering",
+                "date": "2024-01-21",
+                "status": "Present",
+                "exclude": ["EMP004"]
+            }
+        }
+    )
+
+
+class AttendanceBulkItemResult(BaseModel):
+    """Outcome for one employee in a bulk marking request."""
+    employee_id: str
+    date: date
+    marked: bool
+    detail: Optional[str] = None
+
+
+class AttendanceBulkResult(BaseModel):
+    """Outcome of a bulk marking request."""
+    marked: int
+    failed: int
+    results: List[AttendanceBulkItemResult]
+
+
+class EmployeeAttendanceStats(BaseModel):
+    """Attendance totals and streaks of one employee."""
+    employee_id: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    total_present: int
+    total_absent: int
+    attendance_rate: Optional[float] = None  # present / marked days, None if nothing marked
+    longest_streak: int  # Most consecutive "Present" marks
+    current_streak: int  # "Present" marks since the last "Absent"
+    last_marked: Optional[date] = None
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, String, Date, Integer, ForeignKey
+from pydantic import BaseModel
+from typing import List
+from app.database import Base
+
+
+# SQLAlchemy Model
+class AttendanceMonthBitmap(Base):
+    """
+    One employee's attendance for one month as two bitmaps.
+    
+    Bit n (counting from 0) stands for day n + 1 of the month. "marked" has
+    the bit set when the day has a mark, "present" when that mark is
+    "Present". Maintained by triggers on the attendance table; rebuild with
+    `python -m app.cli rebuild-calendar` if it ever drifts.
+    """
+    __tablename__ = "attendance_month_bitmaps"
+    
+    employee_id = Column(
+        String(50), ForeignKey("employees.employee_id", ondelete="CASCADE"), primary_key=True
+    )
+    month = Column(Date, primary_key=True)  # First day of the month
+    marked = Column(Integer, nullable=False, default=0)
+    present = Column(Integer, nullable=False, default=0)
+
+
+# Pydantic Models
+class CalendarRow(BaseModel):
+    """One employee's month: a character per day, P(resent), A(bsent) or - (unmarked)."""
+    employee_id: str
+    full_name: str
+    days: str
+    present: int
+    absent: int
+
+
+class DepartmentCalendar(BaseModel):
+    """Month view of a department."""
+    department: str
+    month: str  # YYYY-MM
+    days_in_month: int
+    employees: List[CalendarRow]
+    daily_present: List[int]  # Employees present on each day
+    daily_absent: List[int]  # Employees absent on each day
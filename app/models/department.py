@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer
+from pydantic import BaseModel
+from app.database import Base
+
+
+# SQLAlchemy Model
+class DepartmentHeadcount(Base):
+    """
+    Number of current (not deleted) employees per department.
+    
+    Maintained by triggers on the employees table; rebuild with
+    `python -m app.cli rebuild-departments` if it ever drifts. Departments
+    whose last employee left keep a row with headcount 0.
+    """
+    __tablename__ = "department_headcounts"
+    
+    department = Column(String(100), primary_key=True)
+    headcount = Column(Integer, nullable=False, default=0)
+
+
+# Pydantic Models
+class DepartmentResponse(BaseModel):
+    """A department and its current headcount."""
+    department: str
+    headcount: int
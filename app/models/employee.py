@@ -1,10 +1,15 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Sequence, Index, text
 from sqlalchemy.sql import func
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from datetime import datetime
+from typing import List, Optional
 from app.database import Base
 
 
+# Source of the numeric part of EMPnnn employee IDs; values are never reused
+employee_id_seq = Sequence("employee_id_seq", metadata=Base.metadata)
+
+
 # SQLAlchemy Model
 class Employee(Base):
     """Employee database model."""
@@ -12,9 +17,24 @@ class Employee(Base):
     
     employee_id = Column(String(50), primary_key=True, index=True)
     full_name = Column(String(255), nullable=False)
-    email = Column(String(255), nullable=False, unique=True)
+    email = Column(String(255), nullable=False)
     department = Column(String(100), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set when the employee is deleted; the row is removed once their
+    # attendance has been purged in the background
+    deleted_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # Keyset pagination order for the employee list: (created_at, employee_id) descending
+        Index("ix_employees_created_at_employee_id", "created_at", "employee_id"),
+        # Department filter of the employee list, in the same page order
+        Index("ix_employees_department_created_at_employee_id", "department", "created_at", "employee_id"),
+        # Tombstones are few; a partial index finds them without a scan
+        Index("ix_employees_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+        # Emails are unique among live employees only, so a deleted
+        # employee's email can be reused before the row is purged
+        Index("uq_employees_email_live", "email", unique=True, postgresql_where=text("deleted_at IS NULL")),
+    )
 
 
 # Pydantic Models
@@ -44,3 +64,29 @@ class EmployeeResponse(EmployeeBase):
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
+
+
+class EmployeeImportError(BaseModel):
+    """A row that could not be imported."""
+    row: int  # 1-based data row number (header excluded)
+    email: Optional[str] = None
+    error: str
+
+
+class EmployeeImportResult(BaseModel):
+    """Outcome of a bulk employee import."""
+    total: int
+    imported: int
+    failed: int
+    errors: List[EmployeeImportError]
+
+
+class EmployeeBatchDelete(BaseModel):
+    """Model for deleting many employees at once."""
+    employee_ids: List[str] = Field(..., min_length=1)
+
+
+class EmployeeBatchDeleteResult(BaseModel):
+    """Outcome of a batch delete."""
+    deleted: List[str]
+    not_found: List[str]
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Date, Integer
+from pydantic import BaseModel
+from datetime import date
+from app.database import Base
+
+
+# SQLAlchemy Model
+class AttendanceDailySummary(Base):
+    """
+    Present/absent counts per day and department.
+    
+    Maintained by triggers on the attendance table; rebuild with
+    `python -m app.cli rebuild-summary` if it ever drifts.
+    """
+    __tablename__ = "attendance_daily_summary"
+    
+    date = Column(Date, primary_key=True)
+    department = Column(String(100), primary_key=True)
+    present = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+
+
+# Pydantic Models
+class DepartmentDailySummary(BaseModel):
+    """Attendance counts of one department on one day."""
+    date: date
+    department: str
+    headcount: int
+    present: int
+    absent: int
+    unmarked: int
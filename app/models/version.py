@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Date, DateTime, BigInteger, SmallInteger
+from app.database import Base
+
+
+# SQLAlchemy Models
+class TableVersion(Base):
+    """
+    Change counter for a whole table, bumped by triggers on every write.
+    Used to build ETags for list endpoints.
+    
+    Each counter is split over shards so concurrent writers do not wait on
+    one row; the table's version is the sum of its shards.
+    """
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String(100), primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, server_default="0")
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
+
+
+class AttendanceDateVersion(Base):
+    """Change counter for the attendance of one day, bumped by triggers (sharded like TableVersion)."""
+    __tablename__ = "attendance_date_versions"
+    
+    date = Column(Date, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, server_default="0")
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
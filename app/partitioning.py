@@ -0,0 +1,281 @@
+"""
+Monthly range partitioning of the attendance table (ATTENDANCE_PARTITIONING).
+
+The partitioned table is created here rather than by create_all(), because
+its primary key has to include the partition key: it is (id, date), while
+the ORM keeps treating id alone as the identity. Each month lives in
+attendance_pYYYYMM; rows outside every month partition land in
+attendance_default. Statement-level triggers stay on the parent and see the
+rows of all partitions.
+"""
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Serializes partition changes when several workers run them at once
+PARTITION_LOCK_ID = 7_140_925_002
+
+DEFAULT_PARTITION = "attendance_default"
+
+# Name the plain table takes while it is converted
+UNPARTITIONED_TABLE = "attendance_unpartitioned"
+
+PARTITIONED_ATTENDANCE_DDL = [
+    """
+    CREATE TABLE attendance (
+        id VARCHAR(50) NOT NULL,
+        employee_id VARCHAR(50) NOT NULL REFERENCES employees (employee_id) ON DELETE CASCADE,
+        date DATE NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT now(),
+        marked_at TIMESTAMPTZ,
+        CONSTRAINT attendance_pkey PRIMARY KEY (id, date),
+        CONSTRAINT uq_attendance_employee_date UNIQUE (employee_id, date),
+        CONSTRAINT check_status CHECK (status IN ('Present', 'Absent'))
+    ) PARTITION BY RANGE (date)
+    """,
+    "CREATE INDEX ix_attendance_date_id ON attendance (date, id)",
+]
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding the given month."""
+    return f"attendance_p{month:%Y%m}"
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+async def _relkind(conn: AsyncConnection, table: str) -> Optional[str]:
+    """'r' for a plain table, 'p' for a partitioned one, None if missing."""
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    )
+    return result.scalar_one_or_none()
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """True if attendance is a partitioned table."""
+    return await _relkind(conn, "attendance") == "p"
+
+
+async def create_partitioned_attendance(conn: AsyncConnection) -> bool:
+    """
+    Create attendance as a partitioned table if it does not exist yet.
+    
+    Must run after employees exists and before create_all() would create a
+    plain attendance table.
+    
+    Args:
+        conn: Connection with an open transaction
+        
+    Returns:
+        True if the table was created
+    """
+    kind = await _relkind(conn, "attendance")
+    if kind == "r":
+        print("⚠️  attendance is not partitioned; run `python -m app.cli partition-attendance` to convert it")
+    if kind is not None:
+        return False
+    
+    for statement in PARTITIONED_ATTENDANCE_DDL:
+        await conn.execute(text(statement))
+    await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF attendance DEFAULT"))
+    return True
+
+
+async def _create_month_partition(conn: AsyncConnection, month: date, source: str = DEFAULT_PARTITION) -> bool:
+    """
+    Create and attach the partition of one month, filling it from source.
+    
+    Rows of the month are moved out of the default partition, or copied
+    from a table being converted. ATTACH scans the new partition and the
+    default partition to prove the range, so both should be small.
+    """
+    name = partition_name(month)
+    if await _relkind(conn, name) is not None:
+        return False
+    
+    start, end = month.isoformat(), _next_month(month).isoformat()
+    columns = "id, employee_id, date, status, created_at, marked_at"
+    # Statements on a partition do not fire the parent's triggers, so the
+    # rollups are left untouched
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE attendance INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    if source == DEFAULT_PARTITION:
+        await conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE date >= '{start}' AND date < '{end}'
+                RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns})
+            SELECT {columns} FROM moved
+        """))
+    else:
+        await conn.execute(text(f"""
+            INSERT INTO {name} ({columns})
+            SELECT {columns} FROM {source}
+            WHERE date >= '{start}' AND date < '{end}'
+        """))
+    await conn.execute(text(
+        f"ALTER TABLE attendance ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+    return True
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    months_ahead: int,
+    first_month: Optional[date] = None
+) -> List[str]:
+    """
+    Create missing month partitions up to months_ahead months from today.
+    
+    Args:
+        conn: Connection with an open transaction
+        months_ahead: Months after the current one to prepare
+        first_month: Earliest month to create (defaults to the current month)
+        
+    Returns:
+        Names of the partitions created by this call
+    """
+    if not await is_partitioned(conn):
+        return []
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": PARTITION_LOCK_ID})
+    
+    month = (first_month or date.today()).replace(day=1)
+    last_month = date.today().replace(day=1)
+    for _ in range(months_ahead):
+        last_month = _next_month(last_month)
+    
+    created = []
+    while month <= last_month:
+        if await _create_month_partition(conn, month):
+            created.append(partition_name(month))
+        month = _next_month(month)
+    return created
+
+
+async def convert_to_partitioned(conn: AsyncConnection) -> List[str]:
+    """
+    Turn an existing plain attendance table into a partitioned one.
+    
+    The old table is set aside and its rows are copied month by month into
+    new partitions, each attached as soon as it is filled. The default
+    partition stays empty until the end, so attaching a month never scans
+    the rows of later months; rows past the last month partition go to it
+    last, and the old table is dropped. Attendance is locked for the whole
+    conversion, so run it during a maintenance window.
+    
+    Args:
+        conn: Connection with an open transaction
+        
+    Returns:
+        Names of the month partitions created
+    """
+    if await _relkind(conn, "attendance") != "r":
+        return []
+    await conn.execute(text("LOCK TABLE attendance IN ACCESS EXCLUSIVE MODE"))
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": PARTITION_LOCK_ID})
+    
+    # Triggers move to the new parent; left on the old table they would fire twice
+    result = await conn.execute(text("""
+        SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+        WHERE tgrelid = 'attendance'::regclass AND NOT tgisinternal
+    """))
+    triggers = result.all()
+    for name, _ in triggers:
+        await conn.execute(text(f'DROP TRIGGER "{name}" ON attendance'))
+    
+    # Index names are schema-wide, so free them for the parent
+    await conn.execute(text(f"ALTER TABLE attendance RENAME TO {UNPARTITIONED_TABLE}"))
+    await conn.execute(text(
+        f"ALTER TABLE {UNPARTITIONED_TABLE} RENAME CONSTRAINT attendance_pkey TO {UNPARTITIONED_TABLE}_pkey"
+    ))
+    await conn.execute(text(
+        f"ALTER TABLE {UNPARTITIONED_TABLE} "
+        f"RENAME CONSTRAINT uq_attendance_employee_date TO {UNPARTITIONED_TABLE}_employee_id_date_key"
+    ))
+    await conn.execute(text(
+        f"ALTER INDEX IF EXISTS ix_attendance_date_id RENAME TO {UNPARTITIONED_TABLE}_date_id_idx"
+    ))
+    
+    for statement in PARTITIONED_ATTENDANCE_DDL:
+        await conn.execute(text(statement))
+    await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF attendance DEFAULT"))
+    for _, definition in triggers:
+        await conn.execute(text(definition))
+    
+    first = (await conn.execute(text(f"SELECT min(date) FROM {UNPARTITIONED_TABLE}"))).scalar()
+    month = (first or date.today()).replace(day=1)
+    last_month = date.today().replace(day=1)
+    for _ in range(settings.attendance_partitions_ahead):
+        last_month = _next_month(last_month)
+    
+    created = []
+    while month <= last_month:
+        if await _create_month_partition(conn, month, source=UNPARTITIONED_TABLE):
+            created.append(partition_name(month))
+        month = _next_month(month)
+    
+    await conn.execute(text(f"""
+        INSERT INTO {DEFAULT_PARTITION} (id, employee_id, date, status, created_at, marked_at)
+        SELECT id, employee_id, date, status, created_at, marked_at FROM {UNPARTITIONED_TABLE}
+        WHERE date >= '{month.isoformat()}'
+    """))
+    await conn.execute(text(f"DROP TABLE {UNPARTITIONED_TABLE}"))
+    return created
+
+
+class PartitionMaintainer:
+    """Keeps month partitions created ahead of time in the background."""
+    
+    def __init__(self, months_ahead: int, check_interval: float):
+        self.months_ahead = months_ahead
+        self.check_interval = check_interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def run_once(self) -> List[str]:
+        async with engine.begin() as conn:
+            created = await ensure_partitions(conn, self.months_ahead)
+        for name in created:
+            logger.info(f"Created attendance partition {name}")
+        return created
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning(f"Attendance partition maintenance failed: {e}")
+    
+    async def start(self):
+        """Create upcoming partitions now, then re-check every check_interval."""
+        if not settings.attendance_partitioning:
+            return
+        try:
+            await self.run_once()
+        except Exception as e:
+            logger.warning(f"Attendance partitions not checked: {e}")
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+# Singleton instance
+partition_maintainer = PartitionMaintainer(
+    settings.attendance_partitions_ahead,
+    settings.partition_check_interval
+)
@@ -1,11 +1,31 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Literal, Optional
 from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.attendance import AttendanceCreate, AttendanceResponse
-from app.services.attendance_service import attendance_service
-from app.utils.exceptions import EmployeeNotFoundError, InvalidAttendanceError
-from app.database import get_db
+from app.config import settings
+from app.models.attendance import (
+    AttendanceCreate, AttendanceResponse, AttendanceBulkCreate, AttendanceDepartmentCreate, AttendanceBulkResult,
+    EmployeeAttendanceStats, ATTENDANCE_STATUSES
+)
+from app.models.summary import DepartmentDailySummary
+from app.models.calendar import DepartmentCalendar
+from app.services.attendance_service import attendance_service, EXPORT_COLUMNS
+from app.services.attendance_writer import attendance_writer
+from app.services.employee_service import employee_service
+from app.services.summary_service import summary_service
+from app.services.calendar_service import calendar_service
+from app.services.version_service import version_service
+from app.utils.exceptions import (
+    EmployeeNotFoundError, InvalidAttendanceError, InvalidCursorError, InvalidFieldsError, InvalidDateRangeError,
+    WriteQueueFullError
+)
+from app.utils.pagination import page_limit
+from app.utils.projection import parse_fields
+from app.utils.responses import list_response
+from app.utils.etag import make_etag, cache_headers, not_modified
+from app.utils.exporters import EXPORT_MEDIA_TYPES, csv_header, csv_rows, ndjson_rows
+from app.database import get_db, get_read_db, streaming_session
 
 router = APIRouter(prefix="/api/v1/attendance", tags=["attendance"])
 
@@ -14,7 +34,11 @@ router = APIRouter(prefix="/api/v1/attendance", tags=["attendance"])
     "",
     response_model=AttendanceResponse,
     status_code=status.HTTP_201_CREATED,
-    summary="Mark attendance for an employee"
+    summary="Mark attendance for an employee",
+    responses={
+        202: {"description": "Queued for writing (write-behind mode)"},
+        503: {"description": "Write queue full; retry after the Retry-After delay"}
+    }
 )
 async def mark_attendance(
     attendance: AttendanceCreate,
@@ -27,7 +51,36 @@ async def mark_attendance(
     - **status**: Either "Present" or "Absent"
     
     If attendance already exists for the given date, it will be updated.
+    
+    With ATTENDANCE_WRITE_MODE=write_behind the mark is validated, queued
+    and answered with 202 (the mark plus `"queue_status": "queued"`);
+    repeated marks for the same employee and day before the next flush
+    collapse into the last one.
     """
+    if settings.attendance_write_mode == "write_behind":
+        if attendance.status not in ATTENDANCE_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Status must be either 'Present' or 'Absent'"
+            )
+        if not await employee_service.employee_exists(db, attendance.employee_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=EmployeeNotFoundError(attendance.employee_id).message
+            )
+        try:
+            attendance_writer.submit(attendance)
+        except WriteQueueFullError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=e.message,
+                headers={"Retry-After": str(max(1, round(settings.write_behind_flush_interval)))}
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"queue_status": "queued", **attendance.model_dump(mode="json")}
+        )
+    
     try:
         return await attendance_service.mark_attendance(db, attendance)
     except EmployeeNotFoundError as e:
@@ -42,6 +95,182 @@ async def mark_attendance(
         )
 
 
+@router.post(
+    "/bulk",
+    response_model=AttendanceBulkResult,
+    summary="Mark attendance for many employees"
+)
+async def mark_attendance_bulk(
+    request: AttendanceBulkCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Mark or update many attendance records in one request:
+    - **records**: List of attendance entries (employee_id, date, status)
+    
+    Entries for unknown employees or with an invalid status are reported in
+    the results and do not prevent the others from being marked. If the same
+    employee and date appear more than once, the last entry wins.
+    """
+    try:
+        return await attendance_service.mark_attendance_bulk(db, request.records)
+    except InvalidAttendanceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+
+
+@router.post(
+    "/bulk/department",
+    response_model=AttendanceBulkResult,
+    summary="Mark attendance for a whole department"
+)
+async def mark_department_attendance(
+    request: AttendanceDepartmentCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Mark every employee of a department for one date:
+    - **department**: Department name
+    - **date**: Attendance date (YYYY-MM-DD format)
+    - **status**: Either "Present" or "Absent" (defaults to "Present")
+    - **exclude**: Employee IDs to leave unchanged
+    """
+    try:
+        return await attendance_service.mark_department_attendance(db, request)
+    except InvalidAttendanceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+
+
+@router.get(
+    "/export",
+    summary="Export attendance as NDJSON or CSV",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}
+    }
+)
+async def export_attendance(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Output format"),
+    start_date: Optional[date] = Query(None, description="Earliest date to include (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Latest date to include (YYYY-MM-DD)"),
+    employee_id: Optional[str] = Query(None, description="Only this employee's records"),
+    include_archived: bool = Query(False, description="Also export records moved to the archive")
+):
+    """
+    Stream attendance history, oldest first, for payroll and reporting.
+    
+    Rows are read through a server-side cursor and written to the response
+    as they arrive, so exports of any size use constant memory. With
+    `include_archived`, archived months are streamed first, one month at a
+    time; a day marked again after archiving is exported once, from the
+    live table.
+    """
+    async def body():
+        if export_format == "csv":
+            yield csv_header(EXPORT_COLUMNS)
+        async with streaming_session() as db:
+            if include_archived:
+                archived = attendance_service.stream_archived_attendance(db, start_date, end_date, employee_id)
+                async for rows in archived:
+                    if export_format == "csv":
+                        yield csv_rows(rows)
+                    else:
+                        yield ndjson_rows(EXPORT_COLUMNS, rows)
+            async for rows in attendance_service.stream_attendance(db, start_date, end_date, employee_id):
+                if export_format == "csv":
+                    yield csv_rows(rows)
+                else:
+                    yield ndjson_rows(EXPORT_COLUMNS, rows)
+    
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="attendance.{export_format}"'}
+    )
+
+
+@router.get(
+    "/summary",
+    response_model=List[DepartmentDailySummary],
+    summary="Daily attendance counts per department"
+)
+async def get_attendance_summary(
+    start_date: date = Query(..., description="First day to report (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last day to report (defaults to start_date)"),
+    department: Optional[str] = Query(None, description="Only this department"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get present, absent and unmarked counts for each department and day.
+    
+    Counts come from a rollup table maintained on every attendance write,
+    so the cost depends on the number of days and departments, not records.
+    Unmarked is measured against each department's current headcount.
+    """
+    try:
+        return await summary_service.get_daily_summary(db, start_date, end_date, department)
+    except InvalidDateRangeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+
+
+@router.get(
+    "/calendar",
+    response_model=DepartmentCalendar,
+    summary="Month calendar of a department"
+)
+async def get_department_calendar(
+    department: str = Query(..., description="Department name"),
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month (YYYY-MM)"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get every employee of a department for one month as a string of
+    day codes (P = present, A = absent, - = unmarked), with per-day totals.
+    
+    Served from per-employee monthly bitmaps, so a month of a large
+    department is a few KB read in one index scan.
+    """
+    year, month_number = (int(part) for part in month.split("-"))
+    return await calendar_service.get_department_calendar(db, department, date(year, month_number, 1))
+
+
+@router.get(
+    "/employee/{employee_id}/stats",
+    response_model=EmployeeAttendanceStats,
+    summary="Get attendance statistics for an employee"
+)
+async def get_employee_attendance_stats(
+    employee_id: str,
+    start_date: Optional[date] = Query(None, description="First day to include (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last day to include (YYYY-MM-DD)"),
+    include_archived: bool = Query(False, description="Also count records moved to the archive"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get totals, attendance rate, longest and current "Present" streak and
+    the last marked date, computed in the database. The response size does
+    not depend on how much history the employee has. Months moved to cold
+    storage are not counted unless `include_archived=true`.
+    """
+    try:
+        return await attendance_service.get_employee_stats(
+            db, employee_id, start_date, end_date, include_archived=include_archived
+        )
+    except EmployeeNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+
+
 @router.get(
     "/employee/{employee_id}",
     response_model=List[AttendanceResponse],
@@ -49,19 +278,39 @@ async def mark_attendance(
 )
 async def get_employee_attendance(
     employee_id: str,
-    db: AsyncSession = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size (enables pagination)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. employee_id,status"),
+    include_archived: bool = Query(False, description="Also return records moved to the archive"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Retrieve all attendance records for a specific employee.
     Records are sorted by date in descending order (most recent first).
+    
+    Pass `limit` (and then `cursor`) to page through the records; the cursor
+    for the next page is returned in the `X-Next-Cursor` header. Pass
+    `fields` to receive only some fields of each record. Old months are
+    moved to cold storage; pass `include_archived=true` to include them.
     """
     try:
-        return await attendance_service.get_employee_attendance(db, employee_id)
+        selected = parse_fields(fields, AttendanceResponse)
+        page = await attendance_service.get_employee_attendance(
+            db, employee_id, limit=page_limit(limit, cursor), cursor=cursor, fields=selected,
+            include_archived=include_archived
+        )
     except EmployeeNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.message
         )
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    
+    return list_response(AttendanceResponse, page.items, selected, page.next_cursor)
 
 
 @router.get(
@@ -70,15 +319,49 @@ async def get_employee_attendance(
     summary="Get all attendance records or filter by date"
 )
 async def get_attendance(
+    request: Request,
     attendance_date: Optional[date] = Query(None, description="Filter by date (YYYY-MM-DD)"),
-    db: AsyncSession = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size (enables pagination)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. employee_id,status"),
+    department: Optional[str] = Query(None, description="Only records of employees in this department"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get attendance records:
     - Without date parameter: Returns all attendance records
     - With date parameter: Returns attendance for specific date (bonus feature)
+    - With department: Returns only records of that department's employees
+    - With limit/cursor: Returns one page; the next cursor is in the `X-Next-Cursor` header
+    - With fields: Returns only the listed fields of each record
+    
+    Responses carry an `ETag`; send it back in `If-None-Match` to get an
+    empty 304 while the requested day (or, without a date, any attendance)
+    is unchanged.
     """
-    if attendance_date:
-        return await attendance_service.get_attendance_by_date(db, attendance_date)
-    else:
-        return await attendance_service.get_all_attendance(db)
+    version = await version_service.get_attendance_version(db, attendance_date)
+    etag = make_etag("attendance", version, request)
+    cached = not_modified(request, etag, version)
+    if cached:
+        return cached
+    
+    try:
+        selected = parse_fields(fields, AttendanceResponse)
+        if attendance_date:
+            page = await attendance_service.get_attendance_by_date(
+                db, attendance_date, limit=page_limit(limit, cursor), cursor=cursor, fields=selected,
+                department=department
+            )
+        else:
+            page = await attendance_service.get_all_attendance(
+                db, limit=page_limit(limit, cursor), cursor=cursor, fields=selected, department=department
+            )
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    
+    return list_response(
+        AttendanceResponse, page.items, selected, page.next_cursor, headers=cache_headers(etag, version)
+    )
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Request
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.department import DepartmentResponse
+from app.services.department_service import department_service
+from app.services.version_service import version_service
+from app.utils.responses import list_response
+from app.utils.etag import make_etag, cache_headers, not_modified
+from app.database import get_read_db
+
+router = APIRouter(prefix="/api/v1/departments", tags=["departments"])
+
+
+@router.get(
+    "",
+    response_model=List[DepartmentResponse],
+    summary="Get all departments"
+)
+async def get_departments(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    List every department with at least one employee, with its headcount,
+    ordered by name. Use a department name with `?department=` on the
+    employee and attendance lists.
+    
+    Responses carry an `ETag`; send it back in `If-None-Match` to get an
+    empty 304 while no employee has changed.
+    """
+    version = await version_service.get_table_version(db, "employees")
+    etag = make_etag("departments", version, request)
+    cached = not_modified(request, etag, version)
+    if cached:
+        return cached
+    
+    departments = await department_service.get_departments(db)
+    return list_response(
+        DepartmentResponse,
+        [department.model_dump() for department in departments],
+        headers=cache_headers(etag, version)
+    )
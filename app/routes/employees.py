@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, File, Query, Request, UploadFile
+from typing import List, Literal, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.employee import EmployeeCreate, EmployeeResponse
+from app.config import settings
+from app.models.employee import (
+    EmployeeCreate, EmployeeResponse, EmployeeImportResult, EmployeeBatchDelete, EmployeeBatchDeleteResult
+)
 from app.services.employee_service import employee_service
-from app.utils.exceptions import EmployeeNotFoundError, DuplicateEmployeeError
-from app.database import get_db
+from app.services.version_service import version_service
+from app.utils.exceptions import EmployeeNotFoundError, DuplicateEmployeeError, InvalidCursorError, InvalidFieldsError
+from app.utils.pagination import page_limit
+from app.utils.projection import parse_fields
+from app.utils.responses import list_response
+from app.utils.etag import make_etag, cache_headers, not_modified
+from app.utils.importers import detect_format, iter_upload_chunks
+from app.database import get_db, get_read_db
 
 router = APIRouter(prefix="/api/v1/employees", tags=["employees"])
 
@@ -35,17 +44,152 @@ async def create_employee(
         )
 
 
+@router.post(
+    "/import",
+    response_model=EmployeeImportResult,
+    summary="Bulk import employees from CSV or NDJSON"
+)
+async def import_employees(
+    file: UploadFile = File(..., description="CSV with a header row, or one JSON object per line"),
+    file_format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, alias="format", description="File format; detected from the file name if omitted"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import many employees in one upload. Each row needs:
+    - **full_name**: Employee's full name
+    - **email**: Valid email address
+    - **department**: Department name
+    
+    Employee IDs are auto-generated. Rows are processed in chunks; invalid
+    rows and duplicate emails are reported individually and do not stop the
+    rest of the file from being imported.
+    """
+    file_format = file_format or detect_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file type; upload a .csv or .ndjson file or pass ?format="
+        )
+    
+    try:
+        chunks = iter_upload_chunks(file, file_format, settings.bulk_chunk_size)
+        return await employee_service.import_employees(db, chunks)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be UTF-8 encoded"
+        )
+
+
+@router.post(
+    "/batch-delete",
+    response_model=EmployeeBatchDeleteResult,
+    summary="Delete many employees"
+)
+async def delete_employees(
+    request: EmployeeBatchDelete,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete many employees in one request:
+    - **employee_ids**: Employee IDs to delete
+    
+    The employees disappear from every endpoint immediately; their attendance
+    records are removed in the background in small chunks. IDs that do not
+    exist are listed in `not_found`. This action cannot be undone.
+    """
+    deleted = await employee_service.delete_employees(db, request.employee_ids)
+    if deleted:
+        background_tasks.add_task(employee_service.purge_deleted)
+    return EmployeeBatchDeleteResult(
+        deleted=deleted,
+        not_found=sorted(set(request.employee_ids) - set(deleted))
+    )
+
+
 @router.get(
     "",
     response_model=List[EmployeeResponse],
     summary="Get all employees"
 )
-async def get_all_employees(db: AsyncSession = Depends(get_db)):
+async def get_all_employees(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size (enables pagination)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. employee_id,full_name"),
+    department: Optional[str] = Query(None, description="Only employees of this department"),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Retrieve a list of all employees in the system.
     Returns an empty list if no employees exist.
+    
+    Pass `limit` (and then `cursor`) to page through employees; the cursor
+    for the next page is returned in the `X-Next-Cursor` header. Pass
+    `fields` to receive only some fields of each employee, and `department`
+    to list a single department.
+    
+    Responses carry an `ETag`; send it back in `If-None-Match` to get an
+    empty 304 while no employee has changed.
+    """
+    version = await version_service.get_table_version(db, "employees")
+    etag = make_etag("employees", version, request)
+    cached = not_modified(request, etag, version)
+    if cached:
+        return cached
+    
+    try:
+        selected = parse_fields(fields, EmployeeResponse)
+        page = await employee_service.get_all_employees(
+            db, limit=page_limit(limit, cursor), cursor=cursor, fields=selected, department=department
+        )
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    
+    return list_response(
+        EmployeeResponse, page.items, selected, page.next_cursor, headers=cache_headers(etag, version)
+    )
+
+
+@router.get(
+    "/search",
+    response_model=List[EmployeeResponse],
+    summary="Search employees"
+)
+async def search_employees(
+    q: str = Query(..., min_length=1, max_length=100, description="Name, email or department text"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. employee_id,full_name"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Find employees whose name, email or department starts with `q` or
+    resembles it (typos and partial words match too). Results are ranked,
+    best match first, prefix matches ahead of fuzzy ones.
+    
+    Results are always paged (`limit` defaults to the standard page size);
+    the cursor for the next page is returned in the `X-Next-Cursor` header.
     """
-    return await employee_service.get_all_employees(db)
+    try:
+        selected = parse_fields(fields, EmployeeResponse)
+        page = await employee_service.search_employees(
+            db, q.strip(), page_limit(limit or settings.default_page_size, cursor),
+            cursor=cursor, fields=selected
+        )
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    
+    return list_response(EmployeeResponse, page.items, selected, page.next_cursor)
 
 
 @router.get(
@@ -55,7 +199,7 @@ async def get_all_employees(db: AsyncSession = Depends(get_db)):
 )
 async def get_employee(
     employee_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get a specific employee by their employee_id.
@@ -76,11 +220,15 @@ async def get_employee(
 )
 async def delete_employee(
     employee_id: str,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Delete an employee and all their attendance records.
     This action cannot be undone.
+    
+    The employee disappears immediately; their attendance records are
+    removed in the background.
     """
     try:
         await employee_service.delete_employee(db, employee_id)
@@ -89,3 +237,4 @@ async def delete_employee(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.message
         )
+    background_tasks.add_task(employee_service.purge_deleted)
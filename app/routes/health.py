@@ -0,0 +1,73 @@
+from fastapi import APIRouter
+from app.database import get_pool_status, replicas
+from app.services.attendance_writer import attendance_writer
+from app.services.employee_index import employee_index
+from app.services.employee_search import employee_search_index
+from app.services.employee_service import employee_service
+from app.utils.idempotency import idempotency_store
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get(
+    "/db-pool",
+    summary="Database connection pool statistics"
+)
+async def get_db_pool_stats():
+    """
+    Report the connection pool mode, occupancy and checkout wait times.
+    Use the wait statistics to size DB_POOL_SIZE and DB_MAX_OVERFLOW.
+    """
+    return get_pool_status()
+
+
+@router.get(
+    "/replicas",
+    summary="Read replica health and replication lag"
+)
+async def get_replica_status():
+    """
+    Report each configured read replica with its last measured lag.
+    Replicas marked unhealthy are skipped and reads go to the primary.
+    """
+    return replicas.status()
+
+
+@router.get(
+    "/caches",
+    summary="In-process cache statistics"
+)
+async def get_cache_stats():
+    """
+    Report hit rates and sizes of this worker's in-process caches.
+    Each worker keeps its own copy, so numbers differ between workers.
+    """
+    return {
+        "employees": employee_service.cache.stats(),
+        "employee_index": {
+            "enabled": employee_index.enabled,
+            "size": len(employee_index),
+            "max_size": employee_index.max_size,
+        },
+        "employee_search": {
+            "backend": (
+                "memory" if employee_search_index.enabled
+                else "substring" if employee_search_index.selected
+                else "postgres"
+            ),
+            "size": len(employee_search_index),
+        },
+        "idempotency": idempotency_store.stats(),
+    }
+
+
+@router.get(
+    "/write-queue",
+    summary="Attendance write-behind queue statistics"
+)
+async def get_write_queue_stats():
+    """
+    Report this worker's pending attendance marks and flush latency.
+    Only used with ATTENDANCE_WRITE_MODE=write_behind.
+    """
+    return attendance_writer.stats()
@@ -0,0 +1,258 @@
+import os
+import re
+from pathlib import Path
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.models.attendance import Attendance
+from app.partitioning import is_partitioned, partition_name
+from app.utils.archive_format import ArchivedRow, encode, decode
+
+# Serializes archive runs
+ARCHIVE_LOCK_ID = 7_140_925_003
+
+_FILE_PATTERN = re.compile(r"^attendance_(\d{4})(\d{2})\.hrmsa$")
+
+
+class ArchivedMonth(NamedTuple):
+    """A month moved to the archive."""
+    month: date
+    rows: int
+    path: str
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class ArchiveService:
+    """
+    Service for moving old attendance to cold storage and reading it back.
+    
+    Whole months are written to one file each under ARCHIVE_DIR (see
+    app.utils.archive_format) and then removed from the attendance table.
+    The daily summary and calendar bitmaps keep counting archived months.
+    Archived rows are only read when a caller asks for them. Files keep the
+    rows of employees deleted later; callers filter those out against the
+    employees table.
+    """
+    
+    def __init__(self, archive_dir: str):
+        self.archive_dir = Path(archive_dir)
+    
+    def path(self, month: date) -> Path:
+        """File holding the given month."""
+        return self.archive_dir / f"attendance_{month:%Y%m}.hrmsa"
+    
+    def archived_months(self) -> List[date]:
+        """Months present in the archive, oldest first."""
+        if not self.archive_dir.is_dir():
+            return []
+        months = []
+        for entry in self.archive_dir.iterdir():
+            match = _FILE_PATTERN.match(entry.name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+    
+    def _read_month(self, month: date, employee_id: Optional[str] = None) -> List[ArchivedRow]:
+        path = self.path(month)
+        if not path.exists():
+            return []
+        return decode(path.read_bytes(), employee_id)
+    
+    def _write_month(self, month: date, rows: List[ArchivedRow]) -> Path:
+        path = self.path(month)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(encode(month, rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+    
+    async def read_employee(self, employee_id: str, before: Optional[date] = None) -> List[ArchivedRow]:
+        """
+        Get an employee's archived rows.
+        
+        Args:
+            employee_id: Employee ID
+            before: Only rows dated before this day
+            
+        Returns:
+            Rows in export column order, newest first
+        """
+        rows: List[ArchivedRow] = []
+        for month in self.archived_months():
+            if before is not None and month >= before:
+                break
+            rows.extend(await run_in_threadpool(self._read_month, month, employee_id))
+        if before is not None:
+            rows = [row for row in rows if row[2] < before]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+    
+    async def iter_rows(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        employee_id: Optional[str] = None
+    ) -> AsyncIterator[List[ArchivedRow]]:
+        """
+        Read archived rows month by month.
+        
+        Args:
+            start_date: Earliest date to include
+            end_date: Latest date to include
+            employee_id: Only this employee's records
+            
+        Yields:
+            One batch per month, ordered by date, oldest first
+        """
+        for month in self.archived_months():
+            if start_date is not None and _next_month(month) <= start_date:
+                continue
+            if end_date is not None and month > end_date:
+                break
+            rows = await run_in_threadpool(self._read_month, month, employee_id)
+            rows = [
+                row for row in rows
+                if (start_date is None or row[2] >= start_date) and (end_date is None or row[2] <= end_date)
+            ]
+            rows.sort(key=lambda row: (row[2], row[0]))
+            if rows:
+                yield rows
+    
+    async def _uncount(self, conn: AsyncConnection, rows: List[ArchivedRow]):
+        """
+        Take archived marks that are being replaced out of the daily summary.
+        
+        The summary kept counting a mark after it was archived, and the
+        insert trigger counted its replacement as well. Bitmaps need no
+        correction: a day's bits are set, not counted.
+        """
+        await conn.execute(text("""
+            INSERT INTO attendance_daily_summary AS s (date, department, present, absent)
+            SELECT c.date, e.department,
+                   -count(*) FILTER (WHERE c.status = 'Present'),
+                   -count(*) FILTER (WHERE c.status = 'Absent')
+            FROM unnest(CAST(:employee_ids AS text[]), CAST(:dates AS date[]), CAST(:statuses AS text[]))
+                AS c (employee_id, date, status)
+            JOIN employees e ON e.employee_id = c.employee_id
+            GROUP BY c.date, e.department
+            ORDER BY c.date, e.department
+            ON CONFLICT (date, department) DO UPDATE
+                SET present = s.present + EXCLUDED.present,
+                    absent = s.absent + EXCLUDED.absent
+        """), {
+            "employee_ids": [row[1] for row in rows],
+            "dates": [row[2] for row in rows],
+            "statuses": [row[3] for row in rows],
+        })
+    
+    async def archive_month(self, conn: AsyncConnection, month: date) -> Optional[ArchivedMonth]:
+        """
+        Move one month of attendance to its archive file.
+        
+        The file is written (merged with any earlier file for the month)
+        before the rows are removed, and the removal commits with the
+        caller's transaction, so a failure never loses rows. With
+        partitioning the month's partition is dropped instead of deleted
+        from.
+        
+        A day marked again since the last run replaces its archived mark,
+        and the old mark is taken out of the daily summary then. Until the
+        month is archived again, such a day counts both marks in the
+        summary; reads of the records themselves already prefer the live
+        row.
+        
+        Args:
+            conn: Connection with an open transaction
+            month: First day of the month to archive
+            
+        Returns:
+            The archived month, or None if it had no rows to move
+        """
+        start, end = month, _next_month(month)
+        columns = [Attendance.id, Attendance.employee_id, Attendance.date, Attendance.status, Attendance.created_at]
+        result = await conn.execute(select(*columns).where(Attendance.date >= start, Attendance.date < end))
+        rows: List[ArchivedRow] = [tuple(row) for row in result]
+        if not rows:
+            return None
+        
+        # Marks added for the month after an earlier run replace the archived ones
+        merged: Dict[Tuple[str, date], ArchivedRow] = {
+            (row[1], row[2]): row for row in await run_in_threadpool(self._read_month, month)
+        }
+        replaced = [merged[(row[1], row[2])] for row in rows if (row[1], row[2]) in merged]
+        merged.update({(row[1], row[2]): row for row in rows})
+        path = await run_in_threadpool(self._write_month, month, list(merged.values()))
+        if replaced:
+            await self._uncount(conn, replaced)
+        
+        partition = partition_name(month)
+        if await is_partitioned(conn) and await conn.scalar(text("SELECT to_regclass(:name)"), {"name": partition}):
+            await conn.execute(text(f"ALTER TABLE attendance DETACH PARTITION {partition}"))
+            await conn.execute(text(f"DROP TABLE {partition}"))
+            # Dropping fires no triggers, so move the version counters by hand
+            await conn.execute(text("""
+                INSERT INTO attendance_date_versions (date, shard, version, updated_at)
+                SELECT d::date, version_shard(), 1, now()
+                FROM generate_series(CAST(:start AS date), CAST(:end AS date) - 1, interval '1 day') AS d
+                ON CONFLICT (date, shard) DO UPDATE
+                    SET version = attendance_date_versions.version + 1, updated_at = EXCLUDED.updated_at
+            """), {"start": start, "end": end})
+            await conn.execute(text("""
+                INSERT INTO table_versions (table_name, shard, version, updated_at)
+                VALUES ('attendance', version_shard(), 1, now())
+                ON CONFLICT (table_name, shard) DO UPDATE
+                    SET version = table_versions.version + 1, updated_at = EXCLUDED.updated_at
+            """))
+        
+        # Rollup triggers skip deletes made while hrms.archiving is on
+        await conn.execute(text("SELECT set_config('hrms.archiving', 'on', true)"))
+        await conn.execute(
+            text("DELETE FROM attendance WHERE date >= :start AND date < :end"), {"start": start, "end": end}
+        )
+        await conn.execute(text("SELECT set_config('hrms.archiving', 'off', true)"))
+        
+        return ArchivedMonth(month, len(merged), str(path))
+    
+    async def archive(self, engine, before: Optional[date] = None) -> List[ArchivedMonth]:
+        """
+        Archive every whole month that ends before the cutoff.
+        
+        Each month is its own transaction, so an interrupted run keeps what
+        it finished.
+        
+        Args:
+            engine: Engine for the primary database
+            before: Cutoff day (defaults to ARCHIVE_AFTER_DAYS ago)
+            
+        Returns:
+            The months archived
+        """
+        before = before or date.today() - timedelta(days=settings.archive_after_days)
+        archived = []
+        async with engine.connect() as conn:
+            oldest = await conn.scalar(select(Attendance.date).order_by(Attendance.date).limit(1))
+        if oldest is None:
+            return archived
+        
+        month = oldest.replace(day=1)
+        while _next_month(month) <= before:
+            async with engine.begin() as conn:
+                await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": ARCHIVE_LOCK_ID})
+                result = await self.archive_month(conn, month)
+            if result:
+                archived.append(result)
+            month = _next_month(month)
+        return archived
+
+
+# Singleton instance
+archive_service = ArchiveService(settings.archive_dir)
@@ -1,11 +1,28 @@
-from typing import List
-from datetime import date
-from sqlalchemy import select, and_
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import select, bindparam, cast, column, or_, union_all, Date, DateTime, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 import uuid
-from app.models.attendance import Attendance, AttendanceCreate, AttendanceResponse
+from app.config import settings
+from app.models.attendance import (
+    Attendance, AttendanceCreate, AttendanceResponse, AttendanceDepartmentCreate,
+    AttendanceBulkItemResult, AttendanceBulkResult, EmployeeAttendanceStats, ATTENDANCE_STATUSES
+)
+from app.models.employee import Employee
+from app.services.archive_service import archive_service
 from app.services.employee_service import employee_service
-from app.utils.exceptions import EmployeeNotFoundError
+from app.utils.exceptions import EmployeeNotFoundError, InvalidAttendanceError
+from app.utils.pagination import Page, fetch_page, encode_cursor, decode_cursor
+from app.utils.projection import projection_select, project
+from app.database import execute_prepared, get_sqlstate, FOREIGN_KEY_VIOLATION, CHECK_VIOLATION
+
+
+# Column order of attendance exports
+EXPORT_COLUMNS = ("id", "employee_id", "date", "status", "created_at")
 
 
 class AttendanceService:
@@ -16,7 +33,14 @@ class AttendanceService:
         Mark or update attendance for an employee.
         
         If attendance already exists for the given date, it will be updated.
-        Otherwise, a new attendance record will be created.
+        Otherwise, a new attendance record will be created. Both cases are a
+        single INSERT ... ON CONFLICT (employee_id, date) DO UPDATE. The
+        employee is checked with employee_exists() first, which the
+        in-process ID index usually answers without a query; this also turns
+        away deleted employees whose rows are still waiting to be purged.
+        
+        The update only applies if the stored mark was not accepted later
+        (see _upsert_statement); otherwise the stored record is returned.
         
         Args:
             db: Database session
@@ -27,102 +51,560 @@ class AttendanceService:
             
         Raises:
             EmployeeNotFoundError: If employee doesn't exist
+            InvalidAttendanceError: If status is not "Present" or "Absent"
         """
-        # Verify employee exists
-        employee = await employee_service.get_employee_by_id(db, attendance.employee_id)
-        if not employee:
+        if not await employee_service.employee_exists(db, attendance.employee_id):
             raise EmployeeNotFoundError(attendance.employee_id)
         
-        # Check if attendance already exists for this date
-        stmt = select(Attendance).where(
-            and_(
-                Attendance.employee_id == attendance.employee_id,
-                Attendance.date == attendance.date
-            )
-        )
-        result = await db.execute(stmt)
-        existing = result.scalar_one_or_none()
+        stmt = self._upsert_statement([{
+            "id": f"att_{uuid.uuid4().hex[:12]}",
+            "employee_id": attendance.employee_id,
+            "date": attendance.date,
+            "status": attendance.status,
+            "marked_at": datetime.now(timezone.utc)
+        }]).returning(Attendance)
         
-        if existing:
-            # Update existing attendance
-            existing.status = attendance.status
+        try:
+            result = await db.execute(stmt, execution_options={"populate_existing": True})
+            record = result.scalar_one_or_none()
+            if record is None:
+                # A mark accepted after this one is already stored
+                result = await db.execute(select(Attendance).where(
+                    Attendance.employee_id == attendance.employee_id,
+                    Attendance.date == attendance.date
+                ))
+                record = result.scalar_one()
             await db.commit()
-            await db.refresh(existing)
-            return AttendanceResponse.model_validate(existing)
-        
-        # Create new attendance record
-        db_attendance = Attendance(
-            id=f"att_{uuid.uuid4().hex[:12]}",
-            employee_id=attendance.employee_id,
-            date=attendance.date,
-            status=attendance.status
+        except IntegrityError as e:
+            await db.rollback()
+            sqlstate = get_sqlstate(e)
+            if sqlstate == FOREIGN_KEY_VIOLATION:
+                raise EmployeeNotFoundError(attendance.employee_id)
+            if sqlstate == CHECK_VIOLATION:
+                raise InvalidAttendanceError("Status must be either 'Present' or 'Absent'")
+            raise
+        
+        return AttendanceResponse.model_validate(record)
+    
+    @staticmethod
+    def _upsert_statement(rows: List[Dict]):
+        """
+        Insert marks, or update the stored ones unless they were accepted later.
+        
+        Marks queued by several workers' write-behind queues are flushed in
+        no particular order; comparing accept times keeps the newest mark
+        whatever order they arrive in. Accept times come from the workers'
+        clocks, so marks accepted within the clock skew of each other can
+        still land either way.
+        """
+        stmt = pg_insert(Attendance).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[Attendance.employee_id, Attendance.date],
+            set_={"status": stmt.excluded.status, "marked_at": stmt.excluded.marked_at},
+            where=or_(Attendance.marked_at.is_(None), Attendance.marked_at <= stmt.excluded.marked_at)
         )
-        db.add(db_attendance)
+    
+    async def _write_marks(self, db: AsyncSession, rows: List[Dict]):
+        """Upsert rows in BULK_CHUNK_SIZE statements and commit."""
+        for start in range(0, len(rows), settings.bulk_chunk_size):
+            await db.execute(self._upsert_statement(rows[start:start + settings.bulk_chunk_size]))
         await db.commit()
-        await db.refresh(db_attendance)
+    
+    async def mark_attendance_bulk(
+        self,
+        db: AsyncSession,
+        records: List[AttendanceCreate],
+        marked_at: Optional[Sequence[datetime]] = None
+    ) -> AttendanceBulkResult:
+        """
+        Mark or update many attendance records at once.
+        
+        Repeated (employee_id, date) entries are collapsed so the last one
+        wins. Employee existence is checked with one set-based query and all
+        valid marks are written as multi-row upserts in a single transaction.
+        
+        The existence check trusts the in-process ID index, which can still
+        list an employee another worker has purged. If the write then hits
+        the foreign key, the IDs are checked again against the database
+        alone, the missing employees' marks are reported as failed and the
+        rest are written.
+        
+        Args:
+            db: Database session
+            records: Attendance entries to mark
+            marked_at: When each entry was accepted (default: now)
+            
+        Returns:
+            Per-entry outcome and totals
+            
+        Raises:
+            InvalidAttendanceError: If employees were deleted while marking
+        """
+        if marked_at is None:
+            marked_at = [datetime.now(timezone.utc)] * len(records)
+        latest: Dict[Tuple[str, date], AttendanceCreate] = {}
+        accepted: Dict[Tuple[str, date], datetime] = {}
+        for record, accepted_at in zip(records, marked_at):
+            latest[(record.employee_id, record.date)] = record
+            accepted[(record.employee_id, record.date)] = accepted_at
+        
+        valid = {key: record for key, record in latest.items() if record.status in ATTENDANCE_STATUSES}
+        employee_ids = {employee_id for employee_id, _ in valid}
+        existing = await employee_service.existing_employee_ids(db, employee_ids)
+        
+        for attempt in range(2):
+            rows = [
+                {
+                    "id": f"att_{uuid.uuid4().hex[:12]}",
+                    "employee_id": employee_id,
+                    "date": attendance_date,
+                    "status": record.status,
+                    "marked_at": accepted[(employee_id, attendance_date)]
+                }
+                for (employee_id, attendance_date), record in valid.items()
+                if employee_id in existing
+            ]
+            try:
+                await self._write_marks(db, rows)
+                break
+            except IntegrityError as e:
+                await db.rollback()
+                if get_sqlstate(e) != FOREIGN_KEY_VIOLATION:
+                    raise
+                if attempt:
+                    raise InvalidAttendanceError("Employees were removed while marking attendance; please retry")
+                existing = await employee_service.existing_employee_ids(db, employee_ids, trust_index=False)
+        
+        results: List[AttendanceBulkItemResult] = []
+        for (employee_id, attendance_date), record in latest.items():
+            detail = None
+            if record.status not in ATTENDANCE_STATUSES:
+                detail = "Status must be either 'Present' or 'Absent'"
+            elif employee_id not in existing:
+                detail = EmployeeNotFoundError(employee_id).message
+            results.append(AttendanceBulkItemResult(
+                employee_id=employee_id, date=attendance_date, marked=detail is None, detail=detail
+            ))
+        
+        return AttendanceBulkResult(
+            marked=len(rows),
+            failed=len(results) - len(rows),
+            results=results
+        )
+    
+    async def mark_department_attendance(
+        self, db: AsyncSession, request: AttendanceDepartmentCreate
+    ) -> AttendanceBulkResult:
+        """
+        Mark every employee of a department for one date.
+        
+        Runs as a single INSERT ... SELECT FROM employees ... ON CONFLICT
+        DO UPDATE, so no employee rows are loaded into the application.
+        
+        Args:
+            db: Database session
+            request: Department, date, status and employees to skip
+            
+        Returns:
+            One result per marked employee
+            
+        Raises:
+            InvalidAttendanceError: If status is not "Present" or "Absent"
+        """
+        if request.status not in ATTENDANCE_STATUSES:
+            raise InvalidAttendanceError("Status must be either 'Present' or 'Absent'")
+        
+        attendance_id = func.concat("att_", func.left(func.replace(cast(func.gen_random_uuid(), String), "-", ""), 12))
+        source = select(
+            attendance_id,
+            Employee.employee_id,
+            bindparam("mark_date", request.date),
+            bindparam("mark_status", request.status, type_=String),
+            bindparam("marked_at", datetime.now(timezone.utc), type_=DateTime(timezone=True))
+        ).where(
+            Employee.department == request.department,
+            Employee.employee_id.not_in(request.exclude),
+            Employee.deleted_at.is_(None)
+        )
+        stmt = pg_insert(Attendance).from_select(
+            ["id", "employee_id", "date", "status", "marked_at"], source
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Attendance.employee_id, Attendance.date],
+            set_={"status": stmt.excluded.status, "marked_at": stmt.excluded.marked_at},
+            where=or_(Attendance.marked_at.is_(None), Attendance.marked_at <= stmt.excluded.marked_at)
+        ).returning(Attendance.employee_id)
+        
+        result = await db.execute(stmt)
+        marked = result.scalars().all()
+        await db.commit()
+        
+        return AttendanceBulkResult(
+            marked=len(marked),
+            failed=0,
+            results=[
+                AttendanceBulkItemResult(employee_id=employee_id, date=request.date, marked=True)
+                for employee_id in sorted(marked)
+            ]
+        )
+    
+    @staticmethod
+    def _employee_live(employee_id: str):
+        """
+        Criterion that holds only while the employee exists and is not deleted.
+        
+        Per-employee reads filter on it in SQL rather than trusting this
+        worker's ID index, which can still hold an employee another worker
+        deleted.
+        """
+        return select(Employee.employee_id).where(
+            Employee.employee_id == employee_id,
+            Employee.deleted_at.is_(None)
+        ).exists()
+    
+    async def _require_employee(self, db: AsyncSession, employee_id: str):
+        """Raise EmployeeNotFoundError unless the database has the employee."""
+        if not await employee_service.existing_employee_ids(db, [employee_id], trust_index=False):
+            raise EmployeeNotFoundError(employee_id)
+    
+    async def _visible(self, db: AsyncSession) -> List[Any]:
+        """Criteria hiding the rows of deleted employees that are not purged yet."""
+        deleted = await employee_service.deleted_employee_ids(db)
+        return [Attendance.employee_id.not_in(deleted)] if deleted else []
+    
+    async def _fetch(
+        self,
+        db: AsyncSession,
+        criteria: Sequence[Any],
+        keys: Sequence[Any],
+        limit: Optional[int],
+        cursor: Optional[str],
+        fields: Optional[Sequence[str]],
+        department: Optional[str] = None
+    ) -> Page:
+        """
+        Fetch a page of attendance as plain dicts of the selected fields.
         
-        return AttendanceResponse.model_validate(db_attendance)
+        Only the needed columns are read and no ORM entities or response
+        models are built; routes serialize the dicts straight to JSON.
+        With a department, records are joined to their employees, which
+        also leaves out deleted employees.
+        """
+        fields = fields or tuple(AttendanceResponse.model_fields)
+        stmt = projection_select(Attendance, fields, keys).where(*criteria)
+        if department is not None:
+            stmt = stmt.join(Employee, Employee.employee_id == Attendance.employee_id).where(
+                Employee.department == department,
+                Employee.deleted_at.is_(None)
+            )
+        page = await fetch_page(db, stmt, keys, limit, cursor)
+        return Page(project(page.items, fields), page.next_cursor)
     
-    async def get_employee_attendance(self, db: AsyncSession, employee_id: str) -> List[AttendanceResponse]:
+    async def get_employee_attendance(
+        self,
+        db: AsyncSession,
+        employee_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        include_archived: bool = False
+    ) -> Page:
         """
-        Get all attendance records for a specific employee.
+        Get attendance records for a specific employee.
         
         Args:
             db: Database session
             employee_id: Employee ID
+            limit: Page size, or None for all records
+            cursor: Cursor from the previous page
+            fields: Fields to select (default: all AttendanceResponse fields)
+            include_archived: Also return records moved to the archive
             
         Returns:
-            List of attendance records ordered by date (newest first)
+            Page of attendance records (dicts) ordered by date (newest first)
             
         Raises:
             EmployeeNotFoundError: If employee doesn't exist
+            InvalidCursorError: If the cursor is malformed
         """
-        # Verify employee exists
-        employee = await employee_service.get_employee_by_id(db, employee_id)
-        if not employee:
-            raise EmployeeNotFoundError(employee_id)
+        # Dates are unique per employee, so date alone orders the pages
+        keys = (Attendance.date,)
+        # Rows only come back while the employee exists, so only an empty
+        # page needs a separate check to tell "no records" from a 404
+        criteria = [Attendance.employee_id == employee_id, self._employee_live(employee_id)]
+        if not include_archived:
+            page = await self._fetch(db, criteria, keys, limit, cursor, fields)
+            if not page.items:
+                await self._require_employee(db, employee_id)
+            return page
         
-        stmt = select(Attendance).where(
-            Attendance.employee_id == employee_id
-        ).order_by(Attendance.date.desc())
+        # Merge a page of live rows with the archived rows below the cursor.
+        # A date marked again after archiving is served from the live table.
+        fields = fields or tuple(AttendanceResponse.model_fields)
+        before = decode_cursor(cursor, keys)[0] if cursor else None
+        stmt = select(*[getattr(Attendance, name) for name in EXPORT_COLUMNS]).where(*criteria)
+        live = await fetch_page(db, stmt, keys, limit, cursor)
+        if not live.items:
+            await self._require_employee(db, employee_id)
+        rows = {row.date: dict(zip(EXPORT_COLUMNS, row)) for row in live.items}
+        for row in await archive_service.read_employee(employee_id, before):
+            rows.setdefault(row[2], dict(zip(EXPORT_COLUMNS, row)))
+        merged = [rows[day] for day in sorted(rows, reverse=True)]
         
-        result = await db.execute(stmt)
-        records = result.scalars().all()
+        next_cursor = None
+        if limit is not None and (len(merged) > limit or live.next_cursor):
+            merged = merged[:limit]
+            next_cursor = encode_cursor([merged[-1]["date"]])
+        return Page([{name: row[name] for name in fields} for row in merged], next_cursor)
+    
+    async def get_employee_stats(
+        self,
+        db: AsyncSession,
+        employee_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_archived: bool = False
+    ) -> EmployeeAttendanceStats:
+        """
+        Compute attendance totals and streaks for an employee.
+        
+        Everything is aggregated in one query: consecutive marks with the
+        same status form a run (row_number() over all marks minus
+        row_number() within the status is constant along a run), and the
+        runs are then folded into totals. Days without a mark do not break
+        a streak, so weekends and holidays need no calendar. Whether the
+        employee exists is read in the same query.
+        
+        Months moved to the archive are left out unless include_archived
+        is set; their marks are then read from the archive files and
+        passed into the same query, and a date marked again after
+        archiving counts its live mark.
+        
+        Args:
+            db: Database session
+            employee_id: Employee ID
+            start_date: First day to include (default: earliest)
+            end_date: Last day to include (default: latest)
+            include_archived: Also count records moved to the archive
+            
+        Returns:
+            Attendance statistics
+            
+        Raises:
+            EmployeeNotFoundError: If employee doesn't exist
+        """
+        live = self._employee_live(employee_id)
+        criteria = [Attendance.employee_id == employee_id, live]
+        if start_date is not None:
+            criteria.append(Attendance.date >= start_date)
+        if end_date is not None:
+            criteria.append(Attendance.date <= end_date)
+        
+        source = select(Attendance.date, Attendance.status).where(*criteria)
+        if include_archived:
+            before = end_date + timedelta(days=1) if end_date is not None else None
+            archived = [
+                row for row in await archive_service.read_employee(employee_id, before)
+                if start_date is None or row[2] >= start_date
+            ]
+            if archived:
+                archived_marks = func.unnest(
+                    bindparam("archived_dates", [row[2] for row in archived], type_=ARRAY(Date)),
+                    bindparam("archived_statuses", [row[3] for row in archived], type_=ARRAY(String))
+                ).table_valued(column("date", Date), column("status", String)).render_derived(name="archived")
+                remarked = select(Attendance.id).where(
+                    Attendance.employee_id == employee_id,
+                    Attendance.date == archived_marks.c.date
+                ).exists()
+                source = union_all(
+                    source,
+                    select(archived_marks.c.date, archived_marks.c.status).where(live, ~remarked)
+                )
+        source = source.subquery("source")
+        
+        marks = select(
+            source.c.date,
+            source.c.status,
+            (
+                func.row_number().over(order_by=source.c.date)
+                - func.row_number().over(partition_by=source.c.status, order_by=source.c.date)
+            ).label("run")
+        ).cte("marks")
+        runs = select(
+            marks.c.status,
+            func.count().label("length"),
+            func.max(marks.c.date).label("run_end")
+        ).group_by(marks.c.status, marks.c.run).cte("runs")
+        
+        present = runs.c.status == "Present"
+        last_marked = select(func.max(marks.c.date)).scalar_subquery()
+        stmt = select(
+            func.coalesce(func.sum(runs.c.length).filter(present), 0).label("total_present"),
+            func.coalesce(func.sum(runs.c.length).filter(runs.c.status == "Absent"), 0).label("total_absent"),
+            func.coalesce(func.max(runs.c.length).filter(present), 0).label("longest_streak"),
+            func.coalesce(
+                func.max(runs.c.length).filter(present, runs.c.run_end == last_marked), 0
+            ).label("current_streak"),
+            func.max(runs.c.run_end).label("last_marked"),
+            live.label("known")
+        )
+        row = (await execute_prepared(db, stmt)).one()
+        if not row.known:
+            raise EmployeeNotFoundError(employee_id)
         
-        return [AttendanceResponse.model_validate(record) for record in records]
+        # sum() over bigint comes back as numeric
+        total_present, total_absent = int(row.total_present), int(row.total_absent)
+        marked = total_present + total_absent
+        return EmployeeAttendanceStats(
+            employee_id=employee_id,
+            start_date=start_date,
+            end_date=end_date,
+            total_present=total_present,
+            total_absent=total_absent,
+            attendance_rate=round(total_present / marked, 4) if marked else None,
+            longest_streak=row.longest_streak,
+            current_streak=row.current_streak,
+            last_marked=row.last_marked
+        )
     
-    async def get_attendance_by_date(self, db: AsyncSession, attendance_date: date) -> List[AttendanceResponse]:
+    async def get_attendance_by_date(
+        self,
+        db: AsyncSession,
+        attendance_date: date,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        department: Optional[str] = None
+    ) -> Page:
         """
-        Get all attendance records for a specific date.
+        Get attendance records for a specific date.
         
         Args:
             db: Database session
             attendance_date: Date to filter by
+            limit: Page size, or None for all records
+            cursor: Cursor from the previous page
+            fields: Fields to select (default: all AttendanceResponse fields)
+            department: Only records of employees in this department
             
         Returns:
-            List of attendance records for the specified date
+            Page of attendance records (dicts) for the specified date
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
         """
-        stmt = select(Attendance).where(Attendance.date == attendance_date)
-        result = await db.execute(stmt)
-        records = result.scalars().all()
-        
-        return [AttendanceResponse.model_validate(record) for record in records]
+        criteria = [Attendance.date == attendance_date]
+        if department is None:
+            criteria.extend(await self._visible(db))
+        return await self._fetch(db, criteria, (Attendance.id,), limit, cursor, fields, department)
     
-    async def get_all_attendance(self, db: AsyncSession) -> List[AttendanceResponse]:
+    async def get_all_attendance(
+        self,
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        department: Optional[str] = None
+    ) -> Page:
         """
         Get all attendance records.
         
         Args:
             db: Database session
+            limit: Page size, or None for all records
+            cursor: Cursor from the previous page
+            fields: Fields to select (default: all AttendanceResponse fields)
+            department: Only records of employees in this department
             
         Returns:
-            List of all attendance records ordered by date (newest first)
+            Page of attendance records (dicts) ordered by date (newest first)
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
         """
-        stmt = select(Attendance).order_by(Attendance.date.desc())
-        result = await db.execute(stmt)
-        records = result.scalars().all()
+        criteria = await self._visible(db) if department is None else []
+        return await self._fetch(
+            db, criteria, (Attendance.date, Attendance.id), limit, cursor, fields, department
+        )
+    
+    async def stream_archived_attendance(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        employee_id: Optional[str] = None
+    ) -> AsyncIterator[Sequence[tuple]]:
+        """
+        Read archived attendance month by month.
+        
+        A day marked again after its month was archived is left out; the
+        live row is exported by stream_attendance() instead, as in the
+        employee view. Rows of deleted employees are left out too, since
+        purging never rewrites archive files.
+        
+        Args:
+            db: Database session
+            start_date: Earliest date to include
+            end_date: Latest date to include
+            employee_id: Only this employee's records
+            
+        Yields:
+            One batch of EXPORT_COLUMNS tuples per month, oldest first
+        """
+        async for rows in archive_service.iter_rows(start_date, end_date, employee_id):
+            employees = await employee_service.existing_employee_ids(
+                db, {row[1] for row in rows}, trust_index=False
+            )
+            rows = [row for row in rows if row[1] in employees]
+            if not rows:
+                continue
+            first, last = rows[0][2], rows[-1][2]
+            stmt = select(Attendance.employee_id, Attendance.date).where(Attendance.date.between(first, last))
+            if employee_id:
+                stmt = stmt.where(Attendance.employee_id == employee_id)
+            live = set((await db.execute(stmt)).all())
+            if live:
+                rows = [row for row in rows if (row[1], row[2]) not in live]
+            if rows:
+                yield rows
+    
+    async def stream_attendance(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        employee_id: Optional[str] = None
+    ) -> AsyncIterator[Sequence[tuple]]:
+        """
+        Stream attendance rows through a server-side cursor.
+        
+        Rows are plain tuples in EXPORT_COLUMNS order, fetched
+        EXPORT_BATCH_SIZE at a time, so memory use does not depend on how
+        many rows match.
+        
+        Args:
+            db: Database session with a transaction (not autocommit)
+            start_date: Earliest date to include
+            end_date: Latest date to include
+            employee_id: Only this employee's records
+            
+        Yields:
+            Batches of rows ordered by date, oldest first
+        """
+        stmt = select(*[getattr(Attendance, column) for column in EXPORT_COLUMNS]).where(*await self._visible(db))
+        if start_date:
+            stmt = stmt.where(Attendance.date >= start_date)
+        if end_date:
+            stmt = stmt.where(Attendance.date <= end_date)
+        if employee_id:
+            stmt = stmt.where(Attendance.employee_id == employee_id)
+        stmt = stmt.order_by(Attendance.date, Attendance.id).execution_options(
+            yield_per=settings.export_batch_size
+        )
         
-        return [AttendanceResponse.model_validate(record) for record in records]
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
 
 
 # Singleton instance
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from datetime import date, datetime, timezone
+from app.config import settings
+from app.database import async_session_maker
+from app.models.attendance import AttendanceCreate
+from app.services.attendance_service import attendance_service
+from app.utils.exceptions import WriteQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceWriteBehind:
+    """
+    In-process write-behind queue for attendance marks
+    (ATTENDANCE_WRITE_MODE=write_behind).
+    
+    Marks are held per (employee_id, date), so repeated marks for the same
+    day collapse into the last one. The queue is flushed through
+    mark_attendance_bulk() when it reaches flush_size or every
+    flush_interval seconds, and once more on shutdown. A full queue rejects
+    new keys (backpressure) but still accepts updates to pending ones.
+    
+    Each mark carries the time it was accepted, and the upsert keeps
+    whichever mark for a day was accepted last. A correction flushed by one
+    worker is therefore not undone by an older mark another worker
+    flushes afterwards.
+    
+    Pending marks live in memory: a crash (not a clean shutdown) loses up
+    to one flush interval of marks.
+    """
+    
+    def __init__(self, max_pending: int, flush_size: int, flush_interval: float):
+        self.max_pending = max_pending
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, date], Tuple[AttendanceCreate, datetime]] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        
+        self.accepted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed = 0
+        self.failed = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+    
+    def submit(self, record: AttendanceCreate):
+        """
+        Queue a mark.
+        
+        Raises:
+            WriteQueueFullError: If the queue is full and the mark is for a new key
+        """
+        key = (record.employee_id, record.date)
+        if key in self._pending:
+            self.coalesced += 1
+        elif len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise WriteQueueFullError()
+        self._pending[key] = (record, datetime.now(timezone.utc))
+        self.accepted += 1
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+    
+    async def flush(self) -> int:
+        """
+        Write every pending mark in one bulk upsert transaction.
+        
+        Marks for employees that no longer exist are dropped and logged.
+        If the write fails, or the flush is cancelled, the batch is put
+        back behind any newer marks for the same keys.
+        
+        Returns:
+            Number of marks written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            
+            started = time.perf_counter()
+            try:
+                async with async_session_maker() as db:
+                    records, accepted = zip(*batch.values())
+                    result = await attendance_service.mark_attendance_bulk(db, list(records), list(accepted))
+            except Exception as e:
+                self.errors += 1
+                self._requeue(batch)
+                logger.warning(f"Attendance write-behind flush failed, {len(batch)} marks re-queued: {e}")
+                return 0
+            except BaseException:
+                self._requeue(batch)
+                raise
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.flushes += 1
+                self.last_flush_ms = elapsed
+                self.max_flush_ms = max(self.max_flush_ms, elapsed)
+                self._total_flush_ms += elapsed
+            
+            self.flushed += result.marked
+            self.failed += result.failed
+            for item in result.results:
+                if not item.marked:
+                    logger.warning(f"Queued attendance for {item.employee_id} on {item.date} dropped: {item.detail}")
+            return result.marked
+    
+    def _requeue(self, batch: Dict[Tuple[str, date], Tuple[AttendanceCreate, datetime]]):
+        """Put an unwritten batch back; marks queued since then win."""
+        batch.update(self._pending)
+        self._pending = batch
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Attendance write-behind flush failed: {e}")
+    
+    async def start(self):
+        """Start the background flusher when write-behind mode is on."""
+        if settings.attendance_write_mode != "write_behind":
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """
+        Stop the flusher and write everything still pending.
+        
+        The flusher is not cancelled: a flush that is already writing is
+        awaited, so its batch is never lost, and the rest is written after.
+        """
+        if self._task:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._pending:
+            logger.error(f"{len(self._pending)} queued attendance marks could not be written on shutdown")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": settings.attendance_write_mode,
+            "depth": len(self._pending),
+            "max_pending": self.max_pending,
+            "accepted": self.accepted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+# Singleton instance
+attendance_writer = AttendanceWriteBehind(
+    settings.write_behind_max_pending,
+    settings.write_behind_flush_size,
+    settings.write_behind_flush_interval
+)
@@ -0,0 +1,150 @@
+import calendar
+from typing import Optional
+from datetime import date, timedelta
+from sqlalchemy import select, insert, delete, and_, text
+from sqlalchemy.sql import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.attendance import Attendance
+from app.models.calendar import AttendanceMonthBitmap, CalendarRow, DepartmentCalendar
+from app.models.employee import Employee
+from app.services.archive_service import archive_service
+from app.database import execute_prepared
+
+
+class CalendarService:
+    """
+    Service for month views built from the attendance bitmaps.
+    
+    Each employee-month is one attendance_month_bitmaps row of two 32-bit
+    integers, so a department's month is read without touching the
+    attendance table.
+    """
+    
+    async def get_department_calendar(self, db: AsyncSession, department: str, month: date) -> DepartmentCalendar:
+        """
+        Get a department's attendance for one month.
+        
+        Args:
+            db: Database session
+            department: Department name
+            month: Any day of the month to report
+            
+        Returns:
+            One row per employee plus per-day present/absent counts
+        """
+        month = month.replace(day=1)
+        days_in_month = calendar.monthrange(month.year, month.month)[1]
+        
+        stmt = (
+            select(
+                Employee.employee_id,
+                Employee.full_name,
+                func.coalesce(AttendanceMonthBitmap.marked, 0),
+                func.coalesce(AttendanceMonthBitmap.present, 0)
+            )
+            .outerjoin(
+                AttendanceMonthBitmap,
+                and_(
+                    AttendanceMonthBitmap.employee_id == Employee.employee_id,
+                    AttendanceMonthBitmap.month == month
+                )
+            )
+            .where(Employee.department == department, Employee.deleted_at.is_(None))
+            .order_by(Employee.employee_id)
+        )
+        
+        rows = []
+        daily_present = [0] * days_in_month
+        daily_absent = [0] * days_in_month
+        for employee_id, full_name, marked, present in await execute_prepared(db, stmt):
+            absent = marked & ~present
+            days = []
+            for day in range(days_in_month):
+                bit = 1 << day
+                if present & bit:
+                    days.append("P")
+                    daily_present[day] += 1
+                elif absent & bit:
+                    days.append("A")
+                    daily_absent[day] += 1
+                else:
+                    days.append("-")
+            rows.append(CalendarRow(
+                employee_id=employee_id,
+                full_name=full_name,
+                days="".join(days),
+                present=present.bit_count(),
+                absent=absent.bit_count()
+            ))
+        
+        return DepartmentCalendar(
+            department=department,
+            month=month.strftime("%Y-%m"),
+            days_in_month=days_in_month,
+            employees=rows,
+            daily_present=daily_present,
+            daily_absent=daily_absent
+        )
+    
+    async def rebuild(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        Recompute the bitmaps from the attendance table.
+        
+        Whole months are rebuilt: the range is widened to the months that
+        contain start_date and end_date. Attendance writes are blocked until
+        the rebuild commits, so the triggers cannot race it. Archived months
+        are left as they are, since their rows are no longer in the
+        attendance table.
+        
+        Args:
+            db: Database session
+            start_date: Day in the first month to rebuild (defaults to the earliest)
+            end_date: Day in the last month to rebuild (defaults to the latest)
+            
+        Returns:
+            Number of bitmap rows written
+        """
+        await db.execute(text("LOCK TABLE attendance IN SHARE MODE"))
+        
+        day_bit = func.attendance_day_bit(Attendance.date)
+        attendance_month = func.date_trunc("month", Attendance.date).cast(AttendanceMonthBitmap.month.type)
+        clear = delete(AttendanceMonthBitmap)
+        source = (
+            select(
+                Attendance.employee_id,
+                attendance_month,
+                func.bit_or(day_bit),
+                func.coalesce(func.bit_or(day_bit).filter(Attendance.status == "Present"), 0)
+            )
+            .group_by(Attendance.employee_id, attendance_month)
+        )
+        if start_date is not None:
+            start_date = start_date.replace(day=1)
+            clear = clear.where(AttendanceMonthBitmap.month >= start_date)
+            source = source.where(Attendance.date >= start_date)
+        if end_date is not None:
+            end_date = end_date.replace(day=1)
+            next_month = (end_date + timedelta(days=32)).replace(day=1)
+            clear = clear.where(AttendanceMonthBitmap.month <= end_date)
+            source = source.where(Attendance.date < next_month)
+        archived = archive_service.archived_months()
+        if archived:
+            clear = clear.where(AttendanceMonthBitmap.month.not_in(archived))
+            source = source.where(attendance_month.not_in(archived))
+        
+        await db.execute(clear)
+        result = await db.execute(
+            insert(AttendanceMonthBitmap).from_select(["employee_id", "month", "marked", "present"], source)
+        )
+        written = result.rowcount
+        await db.commit()
+        return written
+
+
+# Singleton instance
+calendar_service = CalendarService()
@@ -0,0 +1,84 @@
+from typing import Dict, List, Optional
+from sqlalchemy import select, insert, delete, text
+from sqlalchemy.sql import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.department import DepartmentHeadcount, DepartmentResponse
+from app.models.employee import Employee
+from app.database import execute_prepared
+
+
+class DepartmentService:
+    """
+    Service for the department directory.
+    
+    Headcounts come from the department_headcounts table, which triggers on
+    the employees table keep current, so reads cost O(departments) instead
+    of a GROUP BY over every employee.
+    """
+    
+    async def get_departments(self, db: AsyncSession) -> List[DepartmentResponse]:
+        """
+        Get every department that has employees, ordered by name.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Departments with their current headcount
+        """
+        stmt = (
+            select(DepartmentHeadcount.department, DepartmentHeadcount.headcount)
+            .where(DepartmentHeadcount.headcount > 0)
+            .order_by(DepartmentHeadcount.department)
+        )
+        result = await execute_prepared(db, stmt)
+        return [DepartmentResponse(department=row.department, headcount=row.headcount) for row in result]
+    
+    async def get_headcounts(self, db: AsyncSession, department: Optional[str] = None) -> Dict[str, int]:
+        """
+        Get current headcounts by department.
+        
+        Args:
+            db: Database session
+            department: Only this department
+            
+        Returns:
+            Mapping of department to headcount, without empty departments
+        """
+        stmt = select(DepartmentHeadcount.department, DepartmentHeadcount.headcount).where(
+            DepartmentHeadcount.headcount > 0
+        )
+        if department is not None:
+            stmt = stmt.where(DepartmentHeadcount.department == department)
+        return dict((await execute_prepared(db, stmt)).all())
+    
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recompute the headcounts from the employees table.
+        
+        Employee writes are blocked until the rebuild commits, so the
+        triggers cannot race it.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of departments written
+        """
+        await db.execute(text("LOCK TABLE employees IN SHARE MODE"))
+        await db.execute(delete(DepartmentHeadcount))
+        result = await db.execute(
+            insert(DepartmentHeadcount).from_select(
+                ["department", "headcount"],
+                select(Employee.department, func.count())
+                .where(Employee.deleted_at.is_(None))
+                .group_by(Employee.department)
+            )
+        )
+        written = result.rowcount
+        await db.commit()
+        return written
+
+
+# Singleton instance
+department_service = DepartmentService()
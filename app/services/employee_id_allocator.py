@@ -0,0 +1,78 @@
+import asyncio
+from collections import deque
+from typing import Deque, List
+from sqlalchemy import select
+from sqlalchemy.sql import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.employee import employee_id_seq
+
+
+class EmployeeIdAllocator:
+    """
+    Allocates EMPnnn employee IDs from the employee_id_seq sequence.
+    
+    Sequence values survive rollbacks and deletes, so an ID is never handed
+    out twice. With a block size above one, each worker reserves that many
+    values per round-trip and serves them locally; reserved values that are
+    never used leave gaps rather than being reissued.
+    """
+    
+    def __init__(self, block_size: int = 1):
+        self.block_size = max(1, block_size)
+        self._reserved: Deque[int] = deque()
+        self._lock = asyncio.Lock()
+    
+    @staticmethod
+    def format_id(value: int) -> str:
+        """Format a sequence value as an employee ID: 1 -> EMP001."""
+        return f"EMP{value:03d}"
+    
+    async def _draw(self, db: AsyncSession, count: int) -> List[int]:
+        stmt = select(employee_id_seq.next_value()).select_from(func.generate_series(1, count))
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+    
+    async def allocate(self, db: AsyncSession) -> str:
+        """
+        Allocate a single employee ID.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            New employee ID
+        """
+        if self.block_size == 1:
+            values = await self._draw(db, 1)
+            return self.format_id(values[0])
+        
+        async with self._lock:
+            if not self._reserved:
+                self._reserved.extend(await self._draw(db, self.block_size))
+            return self.format_id(self._reserved.popleft())
+    
+    async def allocate_block(self, db: AsyncSession, count: int) -> List[str]:
+        """
+        Allocate several employee IDs in one sequence round-trip.
+        
+        Args:
+            db: Database session
+            count: Number of IDs needed
+            
+        Returns:
+            New employee IDs in ascending order
+        """
+        if count <= 0:
+            return []
+        
+        async with self._lock:
+            values = [self._reserved.popleft() for _ in range(min(count, len(self._reserved)))]
+            if len(values) < count:
+                values.extend(await self._draw(db, count - len(values)))
+        
+        return [self.format_id(value) for value in sorted(values)]
+
+
+# Singleton instance
+employee_id_allocator = EmployeeIdAllocator(settings.employee_id_block_size)
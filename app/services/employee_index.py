@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import select
+from app.config import settings
+from app.database import streaming_session
+from app.models.employee import Employee
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeIdIndex:
+    """
+    In-process set of known employee IDs.
+    
+    Lets attendance paths confirm an employee exists without a database
+    round-trip. Only hits are trusted: a miss may be an employee created by
+    another worker, so callers fall back to the database and add what they
+    find. An ID deleted by another worker can linger until the next refresh,
+    up to EMPLOYEE_INDEX_REFRESH_SECONDS; only attendance writes trust the
+    index, and they still hit the foreign key. Reads check deletion in SQL.
+    
+    The index holds at most EMPLOYEE_INDEX_MAX_SIZE IDs. If headcount
+    exceeds that it switches itself off and every check goes to the database.
+    """
+    
+    def __init__(self, max_size: int, refresh_seconds: float):
+        self.max_size = max_size
+        self.refresh_seconds = refresh_seconds
+        self.enabled = False
+        self._ids: Set[str] = set()
+        # IDs discarded while a load is running, or None outside a load
+        self._discarded: Optional[Set[str]] = None
+        self._refresher: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def contains(self, employee_id: str) -> bool:
+        """True if the employee is known to exist; False means "ask the database"."""
+        return self.enabled and employee_id in self._ids
+    
+    def known(self, employee_ids: Iterable[str]) -> Set[str]:
+        """Subset of employee_ids known to exist."""
+        if not self.enabled:
+            return set()
+        return self._ids.intersection(employee_ids)
+    
+    def add(self, employee_id: str):
+        if self.enabled and len(self._ids) < self.max_size:
+            self._ids.add(employee_id)
+    
+    def add_many(self, employee_ids: Iterable[str]):
+        for employee_id in employee_ids:
+            self.add(employee_id)
+    
+    def discard(self, employee_id: str):
+        self._ids.discard(employee_id)
+        if self._discarded is not None:
+            self._discarded.add(employee_id)
+    
+    async def load(self):
+        """
+        Replace the index with the employee IDs currently in the database.
+        
+        IDs discarded while the load runs may still be in its snapshot, so
+        they are discarded again after the swap.
+        """
+        ids: List[str] = []
+        self._discarded = set()
+        try:
+            async with streaming_session() as db:
+                result = await db.stream_scalars(
+                    select(Employee.employee_id)
+                    .where(Employee.deleted_at.is_(None))
+                    .execution_options(yield_per=settings.export_batch_size)
+                )
+                async for employee_id in result:
+                    ids.append(employee_id)
+                    if len(ids) > self.max_size:
+                        break
+            discarded = self._discarded
+        finally:
+            self._discarded = None
+        
+        if len(ids) > self.max_size:
+            if self.enabled:
+                logger.warning("Employee ID index disabled: headcount exceeds EMPLOYEE_INDEX_MAX_SIZE")
+            self.enabled = False
+            self._ids = set()
+            return
+        
+        self._ids = set(ids) - discarded
+        self.enabled = True
+    
+    async def _run_refresher(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.warning(f"Employee ID index refresh failed: {e}")
+    
+    async def start(self):
+        """Load the index and keep refreshing it in the background."""
+        if self.max_size <= 0:
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            logger.warning(f"Employee ID index not loaded: {e}")
+        self._refresher = asyncio.create_task(self._run_refresher())
+    
+    async def stop(self):
+        if self._refresher:
+            self._refresher.cancel()
+            self._refresher = None
+
+
+# Singleton instance
+employee_index = EmployeeIdIndex(
+    settings.employee_index_max_size,
+    settings.employee_index_refresh_seconds
+)
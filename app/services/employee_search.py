@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import logging
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import Float, column, select, text
+from app.config import settings
+from app.database import streaming_session
+from app.models.employee import Employee
+from app.utils.pagination import Page, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Fields matched by employee search
+SEARCH_FIELDS = ("full_name", "email", "department")
+
+# Search pages are ordered by (score, employee_id) descending. The score
+# only exists in the query, so it is declared here for cursor decoding.
+SEARCH_SCORE = column("score", Float)
+SEARCH_KEYS = (SEARCH_SCORE, Employee.employee_id)
+
+# Default of pg_trgm.word_similarity_threshold, used by both backends
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(value: str) -> FrozenSet[str]:
+    """
+    Trigrams of a string as pg_trgm computes them.
+    
+    The string is lowercased and split into alphanumeric words; each word
+    is padded with two spaces in front and one behind.
+    """
+    grams = set()
+    for word in _WORD.findall(value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class _Document(NamedTuple):
+    row: dict
+    lowered: Tuple[str, ...]
+    grams: Tuple[FrozenSet[str], ...]
+
+
+class EmployeeSearchIndex:
+    """
+    In-process trigram index over employee names, emails and departments.
+    
+    Serves employee search when the pg_trgm extension is not installed
+    (managed databases do not always allow it) or SEARCH_BACKEND=memory.
+    Scores mirror the Postgres query: the best per-field share of the
+    query's trigrams (an approximation of word_similarity), plus 1 when a
+    field starts with the query.
+    
+    Like the employee ID index, it follows this worker's creates and
+    deletes and is reloaded every EMPLOYEE_INDEX_REFRESH_SECONDS to pick
+    up other workers' changes.
+    """
+    
+    def __init__(self, backend: str, refresh_seconds: float):
+        self.backend = backend
+        self.refresh_seconds = refresh_seconds
+        self.enabled = False
+        # Set once start() picks this index over pg_trgm, whether or not it loaded
+        self.selected = False
+        self._documents: Dict[str, _Document] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        # (lowercased field value, employee_id), sorted, for prefix lookups
+        self._prefixes: List[Tuple[str, str]] = []
+        # Adds (row) and discards (None) made while a load is running, or
+        # None outside a load
+        self._changes: Optional[Dict[str, Optional[dict]]] = None
+        self._refresher: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._documents)
+    
+    @staticmethod
+    def _document(row: dict) -> _Document:
+        return _Document(
+            row=row,
+            lowered=tuple(row[field].lower() for field in SEARCH_FIELDS),
+            grams=tuple(trigrams(row[field]) for field in SEARCH_FIELDS)
+        )
+    
+    def add(self, row: dict):
+        """Index an employee given as a dict of EmployeeResponse fields."""
+        if self._changes is not None:
+            self._changes[row["employee_id"]] = row
+        if not self.enabled:
+            return
+        employee_id = row["employee_id"]
+        self.discard(employee_id)
+        document = self._document(row)
+        self._documents[employee_id] = document
+        for gram in frozenset().union(*document.grams):
+            self._postings.setdefault(gram, set()).add(employee_id)
+        for lowered in document.lowered:
+            insort(self._prefixes, (lowered, employee_id))
+    
+    def discard(self, employee_id: str):
+        if self._changes is not None:
+            self._changes[employee_id] = None
+        document = self._documents.pop(employee_id, None)
+        if document is None:
+            return
+        for gram in frozenset().union(*document.grams):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(employee_id)
+                if not postings:
+                    del self._postings[gram]
+        for lowered in document.lowered:
+            i = bisect_left(self._prefixes, (lowered, employee_id))
+            if i < len(self._prefixes) and self._prefixes[i] == (lowered, employee_id):
+                del self._prefixes[i]
+    
+    def _prefix_matches(self, prefix: str) -> Iterator[str]:
+        i = bisect_left(self._prefixes, (prefix,))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(prefix):
+            yield self._prefixes[i][1]
+            i += 1
+    
+    def search(self, query: str, limit: int, cursor: Optional[str] = None) -> Page:
+        """
+        Ranked employee search, one page at a time.
+        
+        Args:
+            query: Search text
+            limit: Page size
+            cursor: Cursor returned with the previous page
+            
+        Returns:
+            Page of employee dicts, best match first
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        after = tuple(decode_cursor(cursor, SEARCH_KEYS)) if cursor else None
+        prefix = query.lower()
+        query_grams = trigrams(query)
+        
+        # Fuzzy candidates share enough trigrams with the query in at least
+        # one field, so they must share that many across all fields
+        needed = WORD_SIMILARITY_THRESHOLD * len(query_grams)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+        prefixed = set(self._prefix_matches(prefix))
+        candidates = prefixed.union(employee_id for employee_id, count in shared.items() if count >= needed)
+        
+        ranked = []
+        for employee_id in candidates:
+            document = self._documents[employee_id]
+            similarity = max(
+                len(query_grams & grams) / len(query_grams) for grams in document.grams
+            ) if query_grams else 0.0
+            is_prefix = employee_id in prefixed
+            if not is_prefix and similarity < WORD_SIMILARITY_THRESHOLD:
+                continue
+            key = (similarity + (1.0 if is_prefix else 0.0), employee_id)
+            if after is None or key < after:
+                ranked.append((key, document.row))
+        
+        ranked = heapq.nlargest(limit + 1, ranked, key=lambda item: item[0])
+        if len(ranked) <= limit:
+            return Page([row for _, row in ranked])
+        ranked = ranked[:limit]
+        return Page([row for _, row in ranked], encode_cursor(list(ranked[-1][0])))
+    
+    async def load(self):
+        """
+        Replace the index with the employees currently in the database.
+        
+        Creates and deletes made on this worker while the load runs may be
+        missing from its snapshot, so they are applied again after the swap.
+        """
+        documents: Dict[str, _Document] = {}
+        postings: Dict[str, Set[str]] = {}
+        prefixes: List[Tuple[str, str]] = []
+        columns = [Employee.employee_id, Employee.created_at, *(getattr(Employee, field) for field in SEARCH_FIELDS)]
+        self._changes = {}
+        try:
+            async with streaming_session() as db:
+                result = await db.stream(
+                    select(*columns)
+                    .where(Employee.deleted_at.is_(None))
+                    .execution_options(yield_per=settings.export_batch_size)
+                )
+                async for row in result:
+                    document = self._document(dict(row._mapping))
+                    documents[row.employee_id] = document
+                    for gram in frozenset().union(*document.grams):
+                        postings.setdefault(gram, set()).add(row.employee_id)
+                    prefixes.extend((lowered, row.employee_id) for lowered in document.lowered)
+            changes = self._changes
+        finally:
+            self._changes = None
+        prefixes.sort()
+        
+        self._documents = documents
+        self._postings = postings
+        self._prefixes = prefixes
+        self.enabled = True
+        for employee_id, row in changes.items():
+            if row is None:
+                self.discard(employee_id)
+            else:
+                self.add(row)
+    
+    async def _use_memory(self) -> bool:
+        if self.backend != "auto":
+            return self.backend == "memory"
+        async with streaming_session() as db:
+            result = await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+            installed = result.scalar() is not None
+        if not installed:
+            logger.warning("pg_trgm is not installed; employee search uses the in-process index")
+        return not installed
+    
+    async def _run_refresher(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.warning(f"Employee search index refresh failed: {e}")
+    
+    async def start(self):
+        """Pick the search backend; load and keep refreshing the in-process one if chosen."""
+        try:
+            self.selected = await self._use_memory()
+            if not self.selected:
+                return
+        except Exception as e:
+            logger.warning(f"Employee search backend check failed, using Postgres: {e}")
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            logger.warning(f"Employee search index not loaded: {e}")
+        self._refresher = asyncio.create_task(self._run_refresher())
+    
+    async def stop(self):
+        if self._refresher:
+            self._refresher.cancel()
+            self._refresher = None
+
+
+# Singleton instance
+employee_search_index = EmployeeSearchIndex(
+    settings.search_backend,
+    settings.employee_index_refresh_seconds
+)
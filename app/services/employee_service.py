@@ -1,20 +1,72 @@
-from typing import List, Optional
-from sqlalchemy import select, delete
+import logging
+import time
+from typing import AsyncIterator, Iterable, List, Optional, Sequence, Set
+from pydantic import ValidationError
+from sqlalchemy import select, update, delete, any_, bindparam, case, cast, literal, or_, tuple_, Float, String
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from app.models.employee import Employee, EmployeeCreate, EmployeeResponse
+from app.models.employee import (
+    Employee, EmployeeCreate, EmployeeResponse, EmployeeImportError, EmployeeImportResult
+)
 from app.models.attendance import Attendance
+from app.services.employee_id_allocator import employee_id_allocator
+from app.services.employee_index import employee_index
+from app.services.employee_search import SEARCH_FIELDS, employee_search_index
+from app.services.version_service import version_service
+from app.utils.cache import CacheBackend, LRUCache, MISSING
+from app.utils.importers import ImportRow
+from app.utils.pagination import Page, fetch_page
+from app.utils.projection import projection_select, project
+from app.config import settings
+from app.database import async_session_maker, execute_prepared, reads_from_replica, use_primary
 from app.utils.exceptions import EmployeeNotFoundError, DuplicateEmployeeError
 
+logger = logging.getLogger(__name__)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards (escape character "/") so user input only matches literally."""
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
 
 class EmployeeService:
-    """Service for employee CRUD operations."""
+    """
+    Service for employee CRUD operations.
+    
+    Single-employee lookups are read through a cache. Unknown IDs are cached
+    too, for EMPLOYEE_CACHE_NEGATIVE_TTL seconds, once the primary has
+    confirmed them. Creates and deletes invalidate their entries. Changes
+    made by other workers move the employees change counter, which is
+    checked at most every EMPLOYEE_CACHE_CHECK_SECONDS; the cache is
+    emptied when it has moved.
+    """
+    
+    def __init__(self, cache: CacheBackend):
+        self.cache = cache
+        self._cache_version = None
+        self._cache_checked_at = float("-inf")
+        self._purging = False
+        self._purge_again = False
+    
+    async def _check_cache(self, db: AsyncSession):
+        """Empty the cache if the employees table changed since it was filled."""
+        now = time.monotonic()
+        if now - self._cache_checked_at < settings.employee_cache_check_seconds:
+            return
+        self._cache_checked_at = now
+        version = await version_service.get_table_version(db, "employees")
+        if version != self._cache_version:
+            self.cache.clear()
+            self._cache_version = version
     
     async def create_employee(self, db: AsyncSession, employee: EmployeeCreate) -> EmployeeResponse:
         """
         Create a new employee with auto-generated sequential ID.
         Employee IDs are generated in format: EMP001, EMP002, EMP003, etc.
+        and are drawn from a database sequence, so concurrent creates never
+        collide and deleted employees' IDs are not reissued.
         
         Args:
             db: Database session
@@ -24,16 +76,11 @@ class EmployeeService:
             Created employee with auto-generated employee_id
             
         Raises:
-            DuplicateEmployeeError: If email already exists
+            DuplicateEmployeeError: If a live employee already has the email
         """
         try:
-            # Count existing employees to generate next sequential ID
-            count_query = select(func.count()).select_from(Employee)
-            result = await db.execute(count_query)
-            employee_count = result.scalar()
-            
             # Generate sequential employee_id: EMP001, EMP002, etc.
-            employee_id = f"EMP{employee_count + 1:03d}"
+            employee_id = await employee_id_allocator.allocate(db)
             
             db_employee = Employee(
                 employee_id=employee_id,
@@ -45,8 +92,12 @@ class EmployeeService:
             db.add(db_employee)
             await db.commit()
             await db.refresh(db_employee)
+            employee_index.add(employee_id)
+            self.cache.delete(employee_id)
             
-            return EmployeeResponse.model_validate(db_employee)
+            response = EmployeeResponse.model_validate(db_employee)
+            employee_search_index.add(response.model_dump())
+            return response
             
         except IntegrityError as e:
             await db.rollback()
@@ -56,21 +107,199 @@ class EmployeeService:
                 raise DuplicateEmployeeError(f"Email {employee.email} already exists")
             raise
     
-    async def get_all_employees(self, db: AsyncSession) -> List[EmployeeResponse]:
+    async def import_employees(
+        self, db: AsyncSession, chunks: AsyncIterator[List[ImportRow]]
+    ) -> EmployeeImportResult:
         """
-        Get all employees ordered by creation date (newest first).
+        Bulk-create employees from chunks of uploaded rows.
+        
+        Each chunk is validated with EmployeeCreate, gets its employee IDs
+        in one sequence round-trip and is written with a single multi-row
+        INSERT ... ON CONFLICT (email) DO NOTHING, then committed. Bad rows
+        and duplicate emails are reported per row instead of failing the
+        import.
         
         Args:
             db: Database session
+            chunks: Parsed rows, one chunk at a time
             
         Returns:
-            List of all employees
+            Import counts and per-row errors
         """
-        stmt = select(Employee).order_by(Employee.created_at.desc())
-        result = await db.execute(stmt)
-        employees = result.scalars().all()
+        total = imported = 0
+        errors: List[EmployeeImportError] = []
         
-        return [EmployeeResponse.model_validate(emp) for emp in employees]
+        async for chunk in chunks:
+            total += len(chunk)
+            valid = []
+            seen_emails = set()
+            
+            for row in chunk:
+                if row.error:
+                    errors.append(EmployeeImportError(row=row.row, error=row.error))
+                    continue
+                try:
+                    employee = EmployeeCreate.model_validate(row.data)
+                except ValidationError as e:
+                    errors.append(EmployeeImportError(
+                        row=row.row,
+                        email=row.data.get("email"),
+                        error="; ".join(
+                            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                        )
+                    ))
+                    continue
+                if employee.email in seen_emails:
+                    errors.append(EmployeeImportError(
+                        row=row.row, email=employee.email, error="Duplicate email in upload"
+                    ))
+                    continue
+                seen_emails.add(employee.email)
+                valid.append((row.row, employee))
+            
+            if not valid:
+                continue
+            
+            try:
+                employee_ids = await employee_id_allocator.allocate_block(db, len(valid))
+                stmt = pg_insert(Employee).values([
+                    {
+                        "employee_id": employee_id,
+                        "full_name": employee.full_name,
+                        "email": employee.email,
+                        "department": employee.department
+                    }
+                    for employee_id, (_, employee) in zip(employee_ids, valid)
+                ]).on_conflict_do_nothing(
+                    index_elements=[Employee.email], index_where=Employee.deleted_at.is_(None)
+                ).returning(Employee.email, Employee.created_at)
+                result = await db.execute(stmt)
+                inserted = dict(result.tuples().all())
+                await db.commit()
+            except IntegrityError as e:
+                await db.rollback()
+                errors.extend(
+                    EmployeeImportError(row=row_number, email=employee.email, error=str(e.orig))
+                    for row_number, employee in valid
+                )
+                continue
+            
+            imported += len(inserted)
+            for employee_id, (_, employee) in zip(employee_ids, valid):
+                if employee.email in inserted:
+                    employee_index.add(employee_id)
+                    employee_search_index.add({
+                        **employee.model_dump(), "employee_id": employee_id, "created_at": inserted[employee.email]
+                    })
+                    self.cache.delete(employee_id)
+            errors.extend(
+                EmployeeImportError(
+                    row=row_number, email=employee.email, error=f"Email {employee.email} already exists"
+                )
+                for row_number, employee in valid
+                if employee.email not in inserted
+            )
+        
+        return EmployeeImportResult(
+            total=total,
+            imported=imported,
+            failed=total - imported,
+            errors=errors
+        )
+    
+    async def get_all_employees(
+        self,
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        department: Optional[str] = None
+    ) -> Page:
+        """
+        Get employees ordered by creation date (newest first).
+        
+        Args:
+            db: Database session
+            limit: Page size, or None for all employees
+            cursor: Cursor from the previous page
+            fields: Fields to select (default: all EmployeeResponse fields)
+            department: Only employees of this department
+            
+        Returns:
+            Page of employees as dicts
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        keys = (Employee.created_at, Employee.employee_id)
+        fields = fields or tuple(EmployeeResponse.model_fields)
+        stmt = projection_select(Employee, fields, keys).where(Employee.deleted_at.is_(None))
+        if department is not None:
+            stmt = stmt.where(Employee.department == department)
+        page = await fetch_page(db, stmt, keys, limit, cursor)
+        
+        return Page(project(page.items, fields), page.next_cursor)
+    
+    async def search_employees(
+        self,
+        db: AsyncSession,
+        query: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Page:
+        """
+        Search employees by name, email and department, best match first.
+        
+        A field matches when it starts with the query (case-insensitive) or
+        when pg_trgm's word_similarity to the query reaches the extension's
+        threshold. Employees are scored by their best field similarity plus
+        1 for a prefix match. Both conditions are served by the trigram GIN
+        indexes from migration 0009; without pg_trgm the in-process index
+        answers instead. Until that index has loaded (or if loading fails),
+        search falls back to plain case-insensitive substring matching
+        without fuzzy matches, prefix matches first; that query cannot use
+        an index.
+        
+        Args:
+            db: Database session
+            query: Search text
+            limit: Page size
+            cursor: Cursor from the previous page
+            fields: Fields to select (default: all EmployeeResponse fields)
+            
+        Returns:
+            Page of employees as dicts
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        fields = fields or tuple(EmployeeResponse.model_fields)
+        if employee_search_index.enabled:
+            page = employee_search_index.search(query, limit, cursor)
+            return Page([{name: row[name] for name in fields} for row in page.items], page.next_cursor)
+        
+        columns = [getattr(Employee, field) for field in SEARCH_FIELDS]
+        pattern = _escape_like(query)
+        is_prefix = or_(*[column.ilike(pattern + "%", escape="/") for column in columns])
+        if employee_search_index.selected:
+            # pg_trgm may be missing, so word_similarity() and <% cannot be used
+            score = cast(case((is_prefix, 1.0), else_=0.0), Float).label("score")
+            matches = or_(*[column.ilike("%" + pattern + "%", escape="/") for column in columns])
+        else:
+            similarity = func.greatest(*[func.word_similarity(query, column) for column in columns])
+            score = cast(similarity + case((is_prefix, 1.0), else_=0.0), Float).label("score")
+            matches = or_(is_prefix, *[literal(query).op("<%")(column) for column in columns])
+        keys = (score, Employee.employee_id)
+        
+        stmt = (
+            projection_select(Employee, fields, keys[1:])
+            .add_columns(score)
+            .where(Employee.deleted_at.is_(None), matches)
+        )
+        page = await fetch_page(db, stmt, keys, limit, cursor)
+        
+        return Page(project(page.items, fields), page.next_cursor)
     
     async def get_employee_by_id(self, db: AsyncSession, employee_id: str) -> Optional[EmployeeResponse]:
         """
@@ -83,15 +312,138 @@ class EmployeeService:
         Returns:
             Employee if found, None otherwise
         """
-        stmt = select(Employee).where(Employee.employee_id == employee_id)
-        result = await db.execute(stmt)
+        await self._check_cache(db)
+        cached = self.cache.get(employee_id)
+        if cached is not MISSING:
+            return cached
+        
+        stmt = select(Employee).where(Employee.employee_id == employee_id, Employee.deleted_at.is_(None))
+        result = await execute_prepared(db, stmt)
         employee = result.scalar_one_or_none()
         
-        return EmployeeResponse.model_validate(employee) if employee else None
+        if employee is None and reads_from_replica(db):
+            # A lagging replica may not have a just-created employee yet, so
+            # the primary confirms a miss before it is remembered
+            use_primary(db)
+            employee = (await execute_prepared(db, stmt)).scalar_one_or_none()
+        
+        if employee is None:
+            self.cache.set(employee_id, None, ttl=settings.employee_cache_negative_ttl)
+            return None
+        
+        response = EmployeeResponse.model_validate(employee)
+        self.cache.set(employee_id, response)
+        return response
+    
+    async def employee_exists(self, db: AsyncSession, employee_id: str) -> bool:
+        """
+        Check whether an employee exists, skipping the database when the
+        in-process ID index already knows the employee.
+        
+        Args:
+            db: Database session
+            employee_id: Employee ID to check
+            
+        Returns:
+            True if the employee exists
+        """
+        if employee_index.contains(employee_id) or self.cache.get(employee_id) not in (None, MISSING):
+            return True
+        
+        stmt = select(Employee.employee_id).where(Employee.employee_id == employee_id, Employee.deleted_at.is_(None))
+        result = await execute_prepared(db, stmt)
+        if result.scalar_one_or_none() is None:
+            return False
+        
+        employee_index.add(employee_id)
+        return True
+    
+    async def existing_employee_ids(
+        self, db: AsyncSession, employee_ids: Iterable[str], trust_index: bool = True
+    ) -> Set[str]:
+        """
+        Return which of the given employee IDs exist.
+        
+        IDs known to the in-process index are not queried; the rest are
+        checked with a single = ANY(array) query. With trust_index=False
+        every ID is checked, and IDs the database no longer has are dropped
+        from the index and the cache (e.g. employees another worker purged).
+        
+        Args:
+            db: Database session
+            employee_ids: Employee IDs to check
+            trust_index: Accept IDs the in-process index knows without a query
+            
+        Returns:
+            The subset of employee_ids that exist
+        """
+        employee_ids = set(employee_ids)
+        found = employee_index.known(employee_ids) if trust_index else set()
+        unknown = employee_ids - found
+        if unknown:
+            stmt = select(Employee.employee_id).where(
+                Employee.employee_id == any_(bindparam("employee_ids", list(unknown), type_=ARRAY(String))),
+                Employee.deleted_at.is_(None)
+            )
+            result = await db.execute(stmt)
+            fetched = set(result.scalars().all())
+            employee_index.add_many(fetched)
+            found |= fetched
+        if not trust_index:
+            for employee_id in employee_ids - found:
+                employee_index.discard(employee_id)
+                self.cache.delete(employee_id)
+        return found
+    
+    async def deleted_employee_ids(self, db: AsyncSession) -> List[str]:
+        """
+        IDs of deleted employees whose attendance is still being purged.
+        
+        Usually empty; read through the partial index on deleted_at so
+        attendance reads can hide these employees' rows.
+        """
+        stmt = select(Employee.employee_id).where(Employee.deleted_at.isnot(None))
+        result = await execute_prepared(db, stmt)
+        return list(result.scalars().all())
+    
+    async def delete_employees(self, db: AsyncSession, employee_ids: Iterable[str]) -> List[str]:
+        """
+        Delete many employees in one statement.
+        
+        Employees are tombstoned (deleted_at is set) and disappear from every
+        read immediately. Their attendance is removed afterwards in bounded
+        chunks by purge_deleted(), which the caller should schedule.
+        
+        Args:
+            db: Database session
+            employee_ids: Employee IDs to delete
+            
+        Returns:
+            IDs that were deleted; the rest did not exist
+        """
+        stmt = (
+            update(Employee)
+            .where(
+                Employee.employee_id == any_(bindparam("employee_ids", list(set(employee_ids)), type_=ARRAY(String))),
+                Employee.deleted_at.is_(None)
+            )
+            .values(deleted_at=func.now())
+            .returning(Employee.employee_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        deleted = sorted(result.scalars().all())
+        await db.commit()
+        
+        for employee_id in deleted:
+            employee_index.discard(employee_id)
+            employee_search_index.discard(employee_id)
+            self.cache.delete(employee_id)
+        return deleted
     
     async def delete_employee(self, db: AsyncSession, employee_id: str) -> bool:
         """
-        Delete employee and cascade delete their attendance records.
+        Delete employee; their attendance is purged in the background.
         
         Args:
             db: Database session
@@ -103,24 +455,72 @@ class EmployeeService:
         Raises:
             EmployeeNotFoundError: If employee doesn't exist
         """
-        stmt = select(Employee).where(Employee.employee_id == employee_id)
-        result = await db.execute(stmt)
-        employee = result.scalar_one_or_none()
-        
-        if not employee:
+        if not await self.delete_employees(db, [employee_id]):
             raise EmployeeNotFoundError(employee_id)
+        return True
+    
+    async def purge_deleted(self) -> int:
+        """
+        Remove tombstoned employees and their attendance.
         
-        # Delete attendance records (CASCADE will handle this, but being explicit)
-        await db.execute(
-            delete(Attendance).where(Attendance.employee_id == employee_id)
-        )
+        Attendance is deleted PURGE_CHUNK_SIZE rows per transaction so no
+        single statement holds locks for long; the employee rows go last.
+        Runs in the background with its own sessions. Calls made while a
+        purge is running in this worker fold into it.
         
-        # Delete employee
-        await db.delete(employee)
-        await db.commit()
+        Returns:
+            Number of attendance rows removed
+        """
+        if self._purging:
+            self._purge_again = True
+            return 0
         
-        return True
+        self._purging = True
+        purged = 0
+        try:
+            while True:
+                self._purge_again = False
+                purged += await self._purge_once()
+                if not self._purge_again:
+                    break
+        except Exception as e:
+            logger.warning(f"Purging deleted employees failed: {e}")
+        finally:
+            self._purging = False
+        return purged
+    
+    async def _purge_once(self) -> int:
+        purged = 0
+        while True:
+            async with async_session_maker() as db:
+                employee_ids = await self.deleted_employee_ids(db)
+                if not employee_ids:
+                    return purged
+                
+                deleted_ids = bindparam("employee_ids", employee_ids, type_=ARRAY(String))
+                chunk = (
+                    select(Attendance.employee_id, Attendance.date)
+                    .where(Attendance.employee_id == any_(deleted_ids))
+                    .limit(settings.purge_chunk_size)
+                )
+                result = await db.execute(
+                    delete(Attendance)
+                    .where(tuple_(Attendance.employee_id, Attendance.date).in_(chunk))
+                    .execution_options(synchronize_session=False)
+                )
+                purged += result.rowcount
+                
+                if result.rowcount == 0:
+                    # Marks racing this point are removed by the FK cascade
+                    await db.execute(
+                        delete(Employee)
+                        .where(Employee.employee_id == any_(deleted_ids), Employee.deleted_at.isnot(None))
+                        .execution_options(synchronize_session=False)
+                    )
+                await db.commit()
 
 
 # Singleton instance
-employee_service = EmployeeService()
+employee_service = EmployeeService(
+    cache=LRUCache(settings.employee_cache_size, settings.employee_cache_ttl)
+)
@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+from sqlalchemy import select, insert, delete, text, Date
+from sqlalchemy.sql import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.models.summary import AttendanceDailySummary, DepartmentDailySummary
+from app.services.archive_service import archive_service
+from app.services.department_service import department_service
+from app.utils.exceptions import InvalidDateRangeError
+from app.database import execute_prepared
+
+
+class SummaryService:
+    """
+    Service for the per-day, per-department attendance rollup.
+    
+    The attendance_daily_summary table is kept current by triggers on the
+    attendance table, so reads cost O(days x departments) regardless of how
+    many records were marked.
+    """
+    
+    async def get_daily_summary(
+        self,
+        db: AsyncSession,
+        start_date: date,
+        end_date: Optional[date] = None,
+        department: Optional[str] = None
+    ) -> List[DepartmentDailySummary]:
+        """
+        Get present/absent/unmarked counts for each day and department.
+        
+        Unmarked is the department's current headcount minus the employees
+        marked that day.
+        
+        Args:
+            db: Database session
+            start_date: First day to report
+            end_date: Last day to report (defaults to start_date)
+            department: Only report this department
+            
+        Returns:
+            One entry per day and department, ordered by date then department
+            
+        Raises:
+            InvalidDateRangeError: If the range is reversed or longer than SUMMARY_MAX_DAYS
+        """
+        end_date = end_date or start_date
+        if end_date < start_date:
+            raise InvalidDateRangeError("end_date must not be before start_date")
+        days = (end_date - start_date).days + 1
+        if days > settings.summary_max_days:
+            raise InvalidDateRangeError(f"Date range must not exceed {settings.summary_max_days} days")
+        
+        summary_stmt = select(
+            AttendanceDailySummary.date,
+            AttendanceDailySummary.department,
+            AttendanceDailySummary.present,
+            AttendanceDailySummary.absent
+        ).where(AttendanceDailySummary.date.between(start_date, end_date))
+        if department is not None:
+            summary_stmt = summary_stmt.where(AttendanceDailySummary.department == department)
+        
+        headcounts = await department_service.get_headcounts(db, department)
+        counts: Dict[Tuple[date, str], Tuple[int, int]] = {
+            (row.date, row.department): (row.present, row.absent)
+            for row in await execute_prepared(db, summary_stmt)
+        }
+        departments = sorted(headcounts.keys() | {dept for _, dept in counts})
+        
+        summary = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            for dept in departments:
+                present, absent = counts.get((day, dept), (0, 0))
+                headcount = headcounts.get(dept, 0)
+                summary.append(DepartmentDailySummary(
+                    date=day,
+                    department=dept,
+                    headcount=headcount,
+                    present=present,
+                    absent=absent,
+                    unmarked=max(headcount - present - absent, 0)
+                ))
+        return summary
+    
+    async def rebuild(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        Recompute the rollup from the attendance table.
+        
+        Attendance writes are blocked until the rebuild commits, so the
+        triggers cannot race it. Archived months are left as they are:
+        their rows are no longer in the attendance table, so recomputing
+        them from it would erase their counts.
+        
+        Args:
+            db: Database session
+            start_date: First day to rebuild (defaults to the earliest)
+            end_date: Last day to rebuild (defaults to the latest)
+            
+        Returns:
+            Number of summary rows written
+        """
+        await db.execute(text("LOCK TABLE attendance IN SHARE MODE"))
+        
+        clear = delete(AttendanceDailySummary)
+        source = (
+            select(
+                Attendance.date,
+                Employee.department,
+                func.count().filter(Attendance.status == "Present"),
+                func.count().filter(Attendance.status == "Absent")
+            )
+            .join(Employee, Employee.employee_id == Attendance.employee_id)
+            .group_by(Attendance.date, Employee.department)
+        )
+        if start_date is not None:
+            clear = clear.where(AttendanceDailySummary.date >= start_date)
+            source = source.where(Attendance.date >= start_date)
+        if end_date is not None:
+            clear = clear.where(AttendanceDailySummary.date <= end_date)
+            source = source.where(Attendance.date <= end_date)
+        archived = archive_service.archived_months()
+        if archived:
+            clear = clear.where(
+                func.date_trunc("month", AttendanceDailySummary.date).cast(Date).not_in(archived)
+            )
+            source = source.where(func.date_trunc("month", Attendance.date).cast(Date).not_in(archived))
+        
+        await db.execute(clear)
+        result = await db.execute(
+            insert(AttendanceDailySummary).from_select(["date", "department", "present", "absent"], source)
+        )
+        written = result.rowcount
+        await db.commit()
+        return written
+
+
+# Singleton instance
+summary_service = SummaryService()
@@ -0,0 +1,73 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import select, union_all
+from sqlalchemy.sql import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.version import TableVersion, AttendanceDateVersion
+from app.utils.etag import Version
+from app.database import execute_prepared
+
+
+class VersionService:
+    """
+    Service for reading the change counters kept by database triggers.
+    
+    Read the version before the data it describes, in the same session.
+    A write landing in between then only makes the ETag older than the
+    body, which costs a cache miss later but never a stale 304.
+    
+    Counters are split over shards (one row each) so writers do not queue
+    on a single row; a version is the sum of its shards.
+    """
+    
+    async def get_table_version(self, db: AsyncSession, table_name: str) -> Version:
+        """
+        Get the change counter of a table.
+        
+        Args:
+            db: Database session
+            table_name: Table name, e.g. "employees"
+            
+        Returns:
+            Current version
+        """
+        stmt = select(
+            func.coalesce(func.sum(TableVersion.version), 0), func.max(TableVersion.updated_at)
+        ).where(TableVersion.table_name == table_name)
+        version, updated_at = (await execute_prepared(db, stmt)).one()
+        return Version(int(version), updated_at)
+    
+    async def get_attendance_version(self, db: AsyncSession, attendance_date: Optional[date] = None) -> Version:
+        """
+        Get a version covering attendance lists.
+        
+        Attendance lists also hide the rows of deleted employees, so the
+        employees counter is folded in. All shards only grow, so their sum
+        changes whenever any of them does.
+        
+        Args:
+            db: Database session
+            attendance_date: The day being listed, or None for all attendance
+            
+        Returns:
+            Current version
+        """
+        if attendance_date is None:
+            attendance = select(TableVersion.version, TableVersion.updated_at).where(
+                TableVersion.table_name == "attendance"
+            )
+        else:
+            attendance = select(AttendanceDateVersion.version, AttendanceDateVersion.updated_at).where(
+                AttendanceDateVersion.date == attendance_date
+            )
+        employees = select(TableVersion.version, TableVersion.updated_at).where(
+            TableVersion.table_name == "employees"
+        )
+        counters = union_all(attendance, employees).subquery()
+        stmt = select(func.coalesce(func.sum(counters.c.version), 0), func.max(counters.c.updated_at))
+        version, updated_at = (await execute_prepared(db, stmt)).one()
+        return Version(int(version), updated_at)
+
+
+# Singleton instance
+version_service = VersionService()
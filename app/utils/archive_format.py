@@ -0,0 +1,147 @@
+"""
+Compact columnar file format for archived attendance.
+
+One file holds one month. Rows are sorted by (employee_id, date) and stored
+column by column, each column zlib-compressed on its own:
+
+- employee: the distinct employee IDs, plus one uint32 index per row
+- day: day of month, one byte per row
+- present: 1 for "Present", 0 for "Absent", one byte per row
+- id: record IDs, newline-separated
+- created_at: microseconds since the epoch (UTC), int64 per row
+
+Layout: MAGIC, a 4-byte big-endian header length, a JSON header with the
+month, row count and (offset, length) of each column, then the columns.
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+MAGIC = b"HRMSATT1"
+
+# Row layout shared with exports: (id, employee_id, date, status, created_at)
+ArchivedRow = Tuple[str, str, date, str, Optional[datetime]]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NO_TIMESTAMP = -(2 ** 63)
+
+
+def _micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return _NO_TIMESTAMP
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def encode(month: date, rows: Sequence[ArchivedRow]) -> bytes:
+    """
+    Encode one month of attendance.
+    
+    Args:
+        month: First day of the month every row belongs to
+        rows: Rows in (id, employee_id, date, status, created_at) order
+        
+    Returns:
+        File contents
+    """
+    rows = sorted(rows, key=lambda row: (row[1], row[2]))
+    employees = sorted({row[1] for row in rows})
+    position = {employee_id: index for index, employee_id in enumerate(employees)}
+    
+    columns = {
+        "employees": "\n".join(employees).encode(),
+        "employee": array("I", (position[row[1]] for row in rows)).tobytes(),
+        "day": bytes(row[2].day for row in rows),
+        "present": bytes(row[3] == "Present" for row in rows),
+        "id": "\n".join(row[0] for row in rows).encode(),
+        "created_at": array("q", (_micros(row[4]) for row in rows)).tobytes(),
+    }
+    
+    blobs = []
+    layout: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    for name, raw in columns.items():
+        blob = zlib.compress(raw, 9)
+        layout[name] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+    
+    header = json.dumps({
+        "month": month.isoformat(),
+        "rows": len(rows),
+        "byteorder": sys.byteorder,
+        "columns": layout,
+    }).encode()
+    return MAGIC + struct.pack(">I", len(header)) + header + b"".join(blobs)
+
+
+def decode(data: bytes, employee_id: Optional[str] = None) -> List[ArchivedRow]:
+    """
+    Decode a month file.
+    
+    Args:
+        data: File contents
+        employee_id: Only return this employee's rows
+        
+    Returns:
+        Rows in (id, employee_id, date, status, created_at) order, sorted by
+        employee then date
+        
+    Raises:
+        ValueError: If the data is not an attendance archive
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("Not an attendance archive")
+    header_start = len(MAGIC) + 4
+    (header_length,) = struct.unpack(">I", data[len(MAGIC):header_start])
+    header = json.loads(data[header_start:header_start + header_length])
+    body = header_start + header_length
+    
+    def column(name: str) -> bytes:
+        offset, length = header["columns"][name]
+        return zlib.decompress(data[body + offset:body + offset + length])
+    
+    def numbers(name: str, typecode: str) -> array:
+        values = array(typecode)
+        values.frombytes(column(name))
+        if header["byteorder"] != sys.byteorder:
+            values.byteswap()
+        return values
+    
+    employees = column("employees").decode().split("\n") if header["rows"] else []
+    employee_index = numbers("employee", "I")
+    
+    # Rows are sorted by employee, so one employee's rows are a contiguous run
+    start, stop = 0, header["rows"]
+    if employee_id is not None:
+        try:
+            wanted = employees.index(employee_id)
+        except ValueError:
+            return []
+        indexes = employee_index.tolist()
+        start = indexes.index(wanted)
+        stop = start
+        while stop < len(indexes) and indexes[stop] == wanted:
+            stop += 1
+    
+    month = date.fromisoformat(header["month"])
+    days = column("day")
+    present = column("present")
+    ids = column("id").decode().split("\n")
+    created = numbers("created_at", "q")
+    
+    return [
+        (
+            ids[row],
+            employees[employee_index[row]],
+            month.replace(day=days[row]),
+            "Present" if present[row] else "Absent",
+            None if created[row] == _NO_TIMESTAMP else _EPOCH + timedelta(microseconds=created[row]),
+        )
+        for row in range(start, stop)
+    ]
@@ -0,0 +1,82 @@
+"""In-process caches."""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Protocol
+
+# Returned by get() when a key is absent or expired (None is a cacheable value)
+MISSING = object()
+
+
+class CacheBackend(Protocol):
+    """Interface services use, so the in-process LRU can be swapped out."""
+    
+    def get(self, key: Hashable) -> Any: ...
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None: ...
+    
+    def delete(self, key: Hashable) -> None: ...
+    
+    def clear(self) -> None: ...
+    
+    def stats(self) -> Dict[str, Any]: ...
+
+
+class LRUCache:
+    """
+    Size-bounded LRU cache with per-entry expiry.
+    
+    Entries expire after ttl seconds (or the per-call ttl), and the least
+    recently used entry is evicted once max_size is reached.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> (expires_at, value), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,70 @@
+"""ETags for conditional GETs on list endpoints."""
+import hashlib
+from typing import Dict, NamedTuple, Optional
+from datetime import datetime
+from email.utils import format_datetime
+from fastapi import Request, Response, status
+
+
+class Version(NamedTuple):
+    """Change counter of a table or day and when it last moved."""
+    version: int
+    updated_at: Optional[datetime]
+
+
+# Reported for tables or days that have never been written
+INITIAL_VERSION = Version(0, None)
+
+
+def make_etag(scope: str, version: Version, request: Request) -> str:
+    """
+    Build a weak ETag from a change counter and the query string.
+    
+    Args:
+        scope: What the version counts, e.g. "employees"
+        version: Current version of the scope
+        request: Incoming request; its query parameters select the page
+        
+    Returns:
+        ETag header value
+    """
+    params = repr(sorted(request.query_params.multi_items())).encode()
+    digest = hashlib.blake2b(params, digest_size=8).hexdigest()
+    return f'W/"{scope}-{version.version}-{digest}"'
+
+
+def cache_headers(etag: str, version: Version) -> Dict[str, str]:
+    """Validator headers to send with a list response."""
+    headers = {"ETag": etag}
+    if version.updated_at is not None:
+        headers["Last-Modified"] = format_datetime(version.updated_at, usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, etag: str, version: Version) -> Optional[Response]:
+    """
+    Answer a conditional GET whose If-None-Match still matches.
+    
+    Only If-None-Match is honoured: Last-Modified has one-second resolution
+    and would hide writes made within the same second.
+    
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+        version: Current version of the resource
+        
+    Returns:
+        A 304 response, or None if the client's copy is out of date
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+    
+    current = opaque(etag)
+    if if_none_match.strip() != "*" and current not in (opaque(tag) for tag in if_none_match.split(",")):
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, version))
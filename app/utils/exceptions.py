@@ -23,3 +23,28 @@ class DuplicateEmployeeError(HRMSException):
 class InvalidAttendanceError(HRMSException):
     """Raised when attendance data is invalid."""
     pass
+
+
+class InvalidCursorError(HRMSException):
+    """Raised when a pagination cursor cannot be decoded."""
+    def __init__(self):
+        super().__init__("Invalid pagination cursor")
+
+
+class InvalidFieldsError(HRMSException):
+    """Raised when a sparse fieldset names unknown fields."""
+    def __init__(self, unknown: list, allowed: list):
+        super().__init__(
+            f"Unknown field(s): {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}"
+        )
+
+
+class InvalidDateRangeError(HRMSException):
+    """Raised when a date range is reversed or too long."""
+    pass
+
+
+class WriteQueueFullError(HRMSException):
+    """Raised when the write-behind queue cannot take more marks."""
+    def __init__(self):
+        super().__init__("Too many pending attendance marks; please retry shortly")
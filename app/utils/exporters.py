@@ -0,0 +1,41 @@
+"""Encoders that turn batches of result rows into streamed export chunks."""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    """Encode the CSV header row."""
+    return csv_rows([columns])
+
+
+def csv_rows(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode rows as CSV lines."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, (date, datetime)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+def ndjson_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode rows as one JSON object per line."""
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+        for row in rows
+    ).encode()
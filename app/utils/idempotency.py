@@ -0,0 +1,188 @@
+"""Idempotency-Key support for JSON POST requests."""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class StoredResponse(NamedTuple):
+    """A captured response, replayed for retries of the same request."""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class _Entry:
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        # Resolves to the response, or None if the first attempt did not finish
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class IdempotencyStore:
+    """
+    In-memory store of recent idempotent requests with TTL eviction.
+    
+    Entries are kept per worker: retries that land on another worker run
+    again, so clients should still expect at-least-once behaviour across
+    workers.
+    """
+    
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.replays = 0
+        self.waits = 0
+        self.conflicts = 0
+    
+    def _evict(self):
+        now = time.monotonic()
+        # Entries are appended in expiry order, so expired ones are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            if not entry.done.done():
+                # Requests still running stay until they finish
+                break
+            del self._entries[key]
+    
+    def get(self, key: str) -> Optional[_Entry]:
+        self._evict()
+        return self._entries.get(key)
+    
+    def begin(self, key: str, fingerprint: str) -> _Entry:
+        entry = _Entry(fingerprint, time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        self._evict()
+        return entry
+    
+    def finish(self, key: str, entry: _Entry, response: Optional[StoredResponse]):
+        if response is None and self._entries.get(key) is entry:
+            del self._entries[key]
+        if not entry.done.done():
+            entry.done.set_result(response)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "replays": self.replays,
+            "waits": self.waits,
+            "conflicts": self.conflicts,
+        }
+
+
+class IdempotencyMiddleware:
+    """
+    Replay stored responses for retried JSON POSTs carrying an Idempotency-Key.
+    
+    The first request with a key runs normally and its response is stored.
+    A retry with the same key, method and path gets that response back
+    (marked with Idempotent-Replayed: true) without reaching the route. A
+    retry that arrives while the first is still running waits for it. A key
+    reused with a different body is rejected with 422. Responses with a 5xx
+    status are not stored, so those requests can be retried for real.
+    """
+    
+    def __init__(self, app: ASGIApp, store: IdempotencyStore):
+        self.app = app
+        self.store = store
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(IDEMPOTENCY_KEY_HEADER.lower().encode())
+        content_type = headers.get(b"content-type", b"")
+        if not key or not content_type.startswith(b"application/json"):
+            await self.app(scope, receive, send)
+            return
+        
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        
+        store_key = f"{scope['path']}\n{key.decode('latin-1')}"
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\n" + body).hexdigest()
+        
+        while True:
+            entry = self.store.get(store_key)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                self.store.conflicts += 1
+                await self._send_json(send, 422, {
+                    "detail": f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request body"
+                })
+                return
+            if not entry.done.done():
+                self.store.waits += 1
+            response = await asyncio.shield(entry.done)
+            if response is not None:
+                self.store.replays += 1
+                await self._replay(send, response)
+                return
+            # The first attempt failed; run this one instead
+        
+        entry = self.store.begin(store_key, fingerprint)
+        captured: Dict[str, Any] = {"status": 500, "headers": [], "body": []}
+        
+        async def replay_body() -> Message:
+            nonlocal body
+            if body is None:
+                return await receive()
+            message = {"type": "http.request", "body": body, "more_body": False}
+            body = None
+            return message
+        
+        async def capture(message: Message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+            await send(message)
+        
+        response = None
+        try:
+            await self.app(scope, replay_body, capture)
+            if captured["status"] < 500:
+                response = StoredResponse(captured["status"], captured["headers"], b"".join(captured["body"]))
+        finally:
+            self.store.finish(store_key, entry, response)
+    
+    @staticmethod
+    async def _replay(send: Send, response: StoredResponse):
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(REPLAYED_HEADER.lower().encode(), b"true")],
+        })
+        await send({"type": "http.response.body", "body": response.body})
+    
+    @staticmethod
+    async def _send_json(send: Send, status: int, content: dict):
+        body = json.dumps(content).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Singleton instance
+idempotency_store = IdempotencyStore(settings.idempotency_ttl, settings.idempotency_max_entries)
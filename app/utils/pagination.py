@@ -0,0 +1,106 @@
+"""Keyset (cursor) pagination helpers for list endpoints."""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import execute_prepared
+from app.utils.exceptions import InvalidCursorError
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple):
+    """One page of results and the cursor for the following page, if any."""
+    items: List[Any]
+    next_cursor: Optional[str] = None
+
+
+def page_limit(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """
+    Resolve the page size for a request.
+    
+    Pagination is opt-in: without limit or cursor the full list is returned.
+    """
+    if limit is None and cursor is None:
+        return None
+    return min(limit or settings.default_page_size, settings.max_page_size)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode key values as an opaque URL-safe cursor."""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor back into typed values for the given key columns.
+    
+    Raises:
+        InvalidCursorError: If the cursor is malformed or does not match the keys
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise InvalidCursorError()
+        values = []
+        for key, value in zip(keys, payload):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise InvalidCursorError()
+            values.append(value)
+        return values
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError()
+
+
+async def fetch_page(
+    db: AsyncSession,
+    stmt,
+    keys: Sequence[Any],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Page:
+    """
+    Run a query ordered by keys (descending), one keyset page at a time.
+    
+    Args:
+        db: Database session
+        stmt: Select statement without ORDER BY or LIMIT
+        keys: Columns that uniquely order the rows, most significant first
+        limit: Page size, or None for all rows
+        cursor: Cursor returned with the previous page
+        
+    Returns:
+        The page of rows and the cursor for the next page
+    """
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        stmt = stmt.where(tuple_(*keys) < tuple_(*values))
+        if len(keys) > 1:
+            # Implied by the row comparison, but only a plain bound on the
+            # leading key lets the planner prune partitions of attendance
+            stmt = stmt.where(keys[0] <= values[0])
+    stmt = stmt.order_by(*[key.desc() for key in keys])
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    
+    result = await execute_prepared(db, stmt)
+    items = result.all()
+    
+    if limit is None or len(items) <= limit:
+        return Page(list(items))
+    
+    items = items[:limit]
+    return Page(list(items), encode_cursor([getattr(items[-1], key.key) for key in keys]))
@@ -0,0 +1,52 @@
+"""Sparse fieldsets: ?fields= column projection for list endpoints."""
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+from typing_extensions import TypedDict
+from app.utils.exceptions import InvalidFieldsError
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated fieldset against a response model.
+    
+    Returns:
+        Requested field names in order, or None when no fieldset was given
+        
+    Raises:
+        InvalidFieldsError: If a name is not a field of the model
+    """
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown or not names:
+        raise InvalidFieldsError(unknown, list(model.model_fields))
+    return names
+
+
+def projection_select(entity: Any, fields: Sequence[str], keys: Sequence[Any] = ()):
+    """Select only the requested columns plus any columns needed for paging."""
+    names = dict.fromkeys([*fields, *(key.key for key in keys)])
+    return select(*[getattr(entity, name) for name in names])
+
+
+def project(rows: Iterable[Any], fields: Sequence[str]) -> List[dict]:
+    """Turn result rows into plain dicts holding only the requested fields."""
+    return [{name: getattr(row, name) for name in fields} for row in rows]
+
+
+@lru_cache(maxsize=256)
+def projection_adapter(model: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    """
+    Serializer for projected rows.
+    
+    Rows come straight from the database, so they are serialized as a
+    TypedDict of the selected fields without building or validating models.
+    """
+    row_type = TypedDict(
+        f"{model.__name__}Fields",
+        {name: model.model_fields[name].annotation for name in fields}
+    )
+    return TypeAdapter(List[row_type])
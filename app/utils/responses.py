@@ -0,0 +1,42 @@
+"""Single-pass JSON responses for list endpoints."""
+from typing import Any, Dict, List, Optional, Sequence, Type
+from fastapi import Response
+from pydantic import BaseModel
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.projection import projection_adapter
+
+
+def list_response(
+    model: Type[BaseModel],
+    items: List[Any],
+    fields: Optional[Sequence[str]] = None,
+    next_cursor: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize list rows to JSON in one pass.
+    
+    Rows are encoded by pydantic-core straight to bytes. Returning a
+    Response makes FastAPI skip its response_model validation and
+    jsonable_encoder pass, while the route's response_model still documents
+    the schema in OpenAPI.
+    
+    Args:
+        model: Response model describing each item
+        items: Row dicts holding the selected fields
+        fields: Selected fields, or None for all model fields
+        next_cursor: Cursor for the next page, sent as X-Next-Cursor
+        headers: Extra response headers, e.g. ETag
+        
+    Returns:
+        JSON response
+    """
+    adapter = projection_adapter(model, tuple(fields or model.model_fields))
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(
+        content=adapter.dump_json(items),
+        media_type="application/json",
+        headers=headers
+    )
@@ -0,0 +1,135 @@
+"""
+10k attendance marks: one request per mark against the batch endpoints.
+
+Seeds throwaway employees, then marks each of them once per mode, on a
+separate date per mode, through the ASGI app (no network):
+
+- per-request: POST /api/v1/attendance for every mark, CONCURRENCY at a time
+  (kiosks at shift start);
+- bulk: POST /api/v1/attendance/bulk with BATCH marks per request;
+- department: one POST /api/v1/attendance/bulk/department.
+
+Reports wall time, marks per second and the SQL statements each mode sent.
+The seeded employees and their attendance are deleted afterwards.
+
+Usage (against an initialized database):
+    python -m benchmarks.bulk_attendance [--marks 10000] [--batch 1000] [--concurrency 10]
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import date
+from typing import Awaitable, Callable, List
+
+import httpx
+from sqlalchemy import delete, event, insert
+
+from app.config import settings
+from app.database import engine
+from app.main import app
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.services.employee_index import employee_index
+
+PREFIX = f"BENCH{os.getpid()}_"
+DEPARTMENT = f"Benchmark {os.getpid()}"
+
+
+async def seed(count: int) -> List[str]:
+    employee_ids = [f"{PREFIX}{i:06d}" for i in range(count)]
+    async with engine.begin() as conn:
+        for start in range(0, count, settings.bulk_chunk_size):
+            chunk = employee_ids[start:start + settings.bulk_chunk_size]
+            await conn.execute(insert(Employee), [
+                {
+                    "employee_id": employee_id,
+                    "full_name": f"Benchmark {employee_id}",
+                    "email": f"{employee_id.lower()}@benchmark.invalid",
+                    "department": DEPARTMENT
+                }
+                for employee_id in chunk
+            ])
+    return employee_ids
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        await conn.execute(delete(Attendance).where(Attendance.employee_id.startswith(PREFIX, autoescape=True)))
+        await conn.execute(delete(Employee).where(Employee.employee_id.startswith(PREFIX, autoescape=True)))
+
+
+async def per_request(client: httpx.AsyncClient, employee_ids: List[str], day: date, concurrency: int, batch: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def mark(employee_id: str):
+        async with semaphore:
+            response = await client.post(
+                "/api/v1/attendance",
+                json={"employee_id": employee_id, "date": day.isoformat(), "status": "Present"}
+            )
+            response.raise_for_status()
+    
+    await asyncio.gather(*(mark(employee_id) for employee_id in employee_ids))
+
+
+async def bulk(client: httpx.AsyncClient, employee_ids: List[str], day: date, concurrency: int, batch: int):
+    for start in range(0, len(employee_ids), batch):
+        records = [
+            {"employee_id": employee_id, "date": day.isoformat(), "status": "Present"}
+            for employee_id in employee_ids[start:start + batch]
+        ]
+        response = await client.post("/api/v1/attendance/bulk", json={"records": records})
+        response.raise_for_status()
+        assert response.json()["failed"] == 0
+
+
+async def department(client: httpx.AsyncClient, employee_ids: List[str], day: date, concurrency: int, batch: int):
+    response = await client.post(
+        "/api/v1/attendance/bulk/department",
+        json={"department": DEPARTMENT, "date": day.isoformat(), "status": "Present"}
+    )
+    response.raise_for_status()
+    assert response.json()["marked"] == len(employee_ids)
+
+
+MODES: List[Callable[..., Awaitable[None]]] = [per_request, bulk, department]
+
+
+async def run(marks: int, batch: int, concurrency: int):
+    # The per-request path is measured synchronously, as a kiosk sees it
+    settings.attendance_write_mode = "sync"
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+    
+    employee_ids = await seed(marks)
+    try:
+        await employee_index.load()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            print(f"{marks} marks, batch {batch}, per-request concurrency {concurrency}")
+            for offset, mode in enumerate(MODES):
+                statements.clear()
+                started = time.perf_counter()
+                await mode(client, employee_ids, date(2000, 1, 3 + offset), concurrency, batch)
+                seconds = time.perf_counter() - started
+                print(
+                    f"  {mode.__name__:<12} {seconds:8.2f} s  {marks / seconds:9.0f} marks/s"
+                    f"  {len(statements):7d} statements"
+                )
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request against batched attendance marking")
+    parser.add_argument("--marks", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=settings.bulk_chunk_size)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.marks, args.batch, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Employee search latency on 100k employees, per backend, against the p99 target.
+
+Creates the employees table in a scratch schema with the app's own DDL
+(the model plus migration 0009's trigram indexes), fills it with EMPLOYEES
+synthetic employees, and runs a mix of queries (name and email prefixes,
+misspelled names, departments) through EmployeeService.search_employees()
+with each backend:
+
+- postgres: pg_trgm's word_similarity and the trigram GIN indexes;
+- memory: the in-process EmployeeSearchIndex, loaded from the same rows;
+- substring: the ILIKE fallback used while the in-process index is not
+  loaded and pg_trgm may be missing.
+
+Reports p50, p99 and max per backend; the target is a p99 under TARGET_MS
+for the Postgres path. The app's own tables are not touched; the schema is
+dropped afterwards unless --keep is given.
+
+Usage (needs a database with pg_trgm available for the postgres backend):
+    python -m benchmarks.employee_search [--dsn postgresql://...] [--employees 100000] [--samples 2000]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+from unittest import mock
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.config import settings
+from app.migrations import MIGRATIONS
+from app.models.employee import Employee
+from app.services import employee_search as search_module
+from app.services import employee_service as service_module
+from app.services.employee_search import EmployeeSearchIndex
+
+SCHEMA = "benchmark_search"
+TARGET_MS = 20.0
+
+FIRST_NAMES = [
+    "Ada", "Alan", "Alice", "Amir", "Anna", "Bruno", "Carla", "Chen", "Daniel", "Dmitri",
+    "Elena", "Emeka", "Fatima", "Grace", "Hiro", "Ines", "Ivan", "Jonas", "Julia", "Kofi",
+    "Lars", "Leila", "Marco", "Maria", "Nadia", "Omar", "Priya", "Rafael", "Sara", "Tomas",
+]
+LAST_NAMES = [
+    "Andersen", "Bauer", "Costa", "Dubois", "Eriksson", "Fischer", "Garcia", "Hoffmann", "Ivanova", "Johnson",
+    "Kowalski", "Lopez", "Moreau", "Nakamura", "Okafor", "Petrov", "Quinn", "Rossi", "Schmidt", "Tanaka",
+    "Umarov", "Varga", "Wagner", "Xu", "Yilmaz", "Zhang", "Novak", "Silva", "Haddad", "Kim",
+]
+DEPARTMENTS = [
+    "Engineering", "Finance", "Human Resources", "Legal", "Marketing",
+    "Operations", "Product", "Research", "Sales", "Support",
+]
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word))
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def sample_queries(count: int, rng: random.Random) -> List[str]:
+    """Queries of the kinds the search box sends."""
+    makers = [
+        lambda: rng.choice(FIRST_NAMES)[:3],
+        lambda: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        lambda: _typo(rng.choice(LAST_NAMES), rng),
+        lambda: rng.choice(LAST_NAMES).lower()[:4],
+        lambda: rng.choice(DEPARTMENTS),
+    ]
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+async def build(engine: AsyncEngine, employees: int, rng: random.Random):
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        # search_path puts the scratch schema first, so the unqualified DDL lands there
+        await conn.run_sync(Employee.__table__.create)
+        for statement in dict(MIGRATIONS)["0009_employee_search"]:
+            await conn.execute(text(statement))
+    
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        for start in range(0, employees, settings.bulk_chunk_size):
+            rows = []
+            for i in range(start, min(start + settings.bulk_chunk_size, employees)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                rows.append({
+                    "employee_id": f"EMP{i + 1:06d}",
+                    "full_name": f"{first} {last}",
+                    "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                    "department": rng.choice(DEPARTMENTS),
+                })
+            await conn.execute(insert(Employee), rows)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.employees"))
+    print(f"  loaded {employees:,} employees in {time.perf_counter() - started:.0f} s")
+
+
+async def time_search(engine: AsyncEngine, index: EmployeeSearchIndex, queries: List[str], limit: int) -> List[float]:
+    """Latency of each query through the search service, in milliseconds (after a warm-up pass)."""
+    timings = []
+    with mock.patch.object(service_module, "employee_search_index", index):
+        async with AsyncSession(engine) as db:
+            for query in queries[:50]:
+                await service_module.employee_service.search_employees(db, query, limit)
+                await db.rollback()
+            for query in queries:
+                started = time.perf_counter()
+                await service_module.employee_service.search_employees(db, query, limit)
+                timings.append((time.perf_counter() - started) * 1000)
+                await db.rollback()
+    return timings
+
+
+def report(name: str, timings: List[float]):
+    p50 = statistics.median(timings)
+    p99 = statistics.quantiles(timings, n=100)[98]
+    verdict = "meets" if p99 < TARGET_MS else "misses"
+    print(f"  {name:<10} p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   max {max(timings):7.2f} ms   ({verdict} {TARGET_MS:.0f} ms)")
+
+
+async def run(dsn: str, employees: int, samples: int, limit: int, keep: bool):
+    engine = create_async_engine(
+        dsn.replace("postgresql://", "postgresql+asyncpg://"),
+        connect_args={"server_settings": {"search_path": f"{SCHEMA}, public", "jit": "off"}}
+    )
+    try:
+        rng = random.Random(24)
+        await build(engine, employees, rng)
+        queries = sample_queries(samples, rng)
+        print(f"{samples} queries, {limit} results per page")
+        
+        async with engine.connect() as conn:
+            has_trgm = await conn.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        if has_trgm:
+            report("postgres", await time_search(engine, EmployeeSearchIndex("postgres", 0), queries, limit))
+        else:
+            print("  postgres   skipped: pg_trgm is not installed")
+        
+        memory = EmployeeSearchIndex("memory", 0)
+        with mock.patch.object(search_module, "streaming_session", lambda: AsyncSession(engine)):
+            await memory.load()
+        memory.selected = True
+        report("memory", await time_search(engine, memory, queries, limit))
+        
+        substring = EmployeeSearchIndex("memory", 0)
+        substring.selected = True
+        report("substring", await time_search(engine, substring, queries, limit))
+    finally:
+        if not keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Employee search latency per backend")
+    parser.add_argument("--dsn", default=settings.database_url)
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=settings.default_page_size)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema for inspection")
+    args = parser.parse_args()
+    asyncio.run(run(args.dsn, args.employees, args.samples, args.limit, args.keep))
+
+
+if __name__ == "__main__":
+    main()
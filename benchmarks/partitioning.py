@@ -0,0 +1,141 @@
+"""
+Date-filtered attendance reads on a partitioned table against a plain one.
+
+Builds two copies of the same synthetic attendance (EMPLOYEES employees
+marked every day for DAYS days; the defaults give 10M rows) in a scratch
+schema, one plain and one partitioned by month like ATTENDANCE_PARTITIONING,
+with the app's indexes. It then times the date-filtered reads the API
+sends against both:
+
+- one day's page (GET /attendance?date=...&limit=100);
+- one month of marks for the summary and calendar rebuilds;
+- one employee's month (GET /attendance/employee/{id} with a date range).
+
+The app's own tables are not touched; the schema is dropped afterwards
+unless --keep is given. Loading takes a few minutes at the default size.
+
+Usage (needs a database):
+    python -m benchmarks.partitioning [--dsn postgresql://...] [--employees 5000] [--days 2000]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import asyncpg
+
+from app.config import settings
+
+SCHEMA = "benchmark_partitioning"
+START = date(2020, 1, 1)
+
+COLUMNS = """
+    id VARCHAR(50) NOT NULL,
+    employee_id VARCHAR(50) NOT NULL,
+    date DATE NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now()
+"""
+
+QUERIES: List[Tuple[str, str]] = [
+    ("day page", "SELECT * FROM {table} WHERE date = $1 ORDER BY id LIMIT 100"),
+    (
+        "month of marks",
+        "SELECT date, status, count(*) FROM {table} "
+        "WHERE date >= date_trunc('month', $1::date) AND date < date_trunc('month', $1::date) + interval '1 month' "
+        "GROUP BY date, status"
+    ),
+    (
+        "employee month",
+        "SELECT * FROM {table} WHERE employee_id = $2 "
+        "AND date >= date_trunc('month', $1::date) AND date < date_trunc('month', $1::date) + interval '1 month' "
+        "ORDER BY date DESC"
+    ),
+]
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+async def build(conn: asyncpg.Connection, employees: int, days: int):
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"""
+        CREATE TABLE {SCHEMA}.plain ({COLUMNS},
+            PRIMARY KEY (id), UNIQUE (employee_id, date))
+    """)
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.plain (date, id)")
+    await conn.execute(f"""
+        CREATE TABLE {SCHEMA}.parted ({COLUMNS},
+            PRIMARY KEY (id, date), UNIQUE (employee_id, date)) PARTITION BY RANGE (date)
+    """)
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.parted (date, id)")
+    month, end = START, START + timedelta(days=days)
+    while month < end:
+        await conn.execute(
+            f"CREATE TABLE {SCHEMA}.parted_p{month:%Y%m} PARTITION OF {SCHEMA}.parted "
+            f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+        )
+        month = _next_month(month)
+    
+    for table in ("plain", "parted"):
+        started = time.perf_counter()
+        await conn.execute(f"""
+            INSERT INTO {SCHEMA}.{table} (id, employee_id, date, status)
+            SELECT 'att_' || e || '_' || d, 'EMP' || lpad(e::text, 5, '0'), $1::date + d,
+                   CASE WHEN random() < 0.9 THEN 'Present' ELSE 'Absent' END
+            FROM generate_series(0, $2::int - 1) AS d, generate_series(1, $3::int) AS e
+        """, START, days, employees)
+        await conn.execute(f"VACUUM ANALYZE {SCHEMA}.{table}")
+        print(f"  loaded {table} in {time.perf_counter() - started:.0f} s")
+
+
+async def time_query(conn: asyncpg.Connection, sql: str, samples: List[Tuple[date, str]]) -> float:
+    """Mean latency in milliseconds over the samples (after one warm-up pass)."""
+    statement = await conn.prepare(sql)
+    arity = len(statement.get_parameters())
+    for sample in samples[:10]:
+        await statement.fetch(*sample[:arity])
+    started = time.perf_counter()
+    for sample in samples:
+        await statement.fetch(*sample[:arity])
+    return (time.perf_counter() - started) / len(samples) * 1000
+
+
+async def run(dsn: str, employees: int, days: int, samples: int, keep: bool):
+    conn = await asyncpg.connect(dsn, server_settings={"jit": "off"})
+    try:
+        print(f"{employees * days:,} rows ({employees} employees x {days} days)")
+        await build(conn, employees, days)
+        rng = random.Random(19)
+        picks = [
+            (START + timedelta(days=rng.randrange(days)), f"EMP{rng.randint(1, employees):05d}")
+            for _ in range(samples)
+        ]
+        print(f"mean of {samples} random dates")
+        for name, sql in QUERIES:
+            plain = await time_query(conn, sql.format(table=f"{SCHEMA}.plain"), picks)
+            parted = await time_query(conn, sql.format(table=f"{SCHEMA}.parted"), picks)
+            print(f"  {name:<15} plain {plain:8.2f} ms   partitioned {parted:8.2f} ms   ({plain / parted:.1f}x)")
+    finally:
+        if not keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned against plain attendance for date-filtered reads")
+    parser.add_argument("--dsn", default=settings.database_url)
+    parser.add_argument("--employees", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema for inspection")
+    args = parser.parse_args()
+    asyncio.run(run(args.dsn, args.employees, args.days, args.samples, args.keep))
+
+
+if __name__ == "__main__":
+    main()
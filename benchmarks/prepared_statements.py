@@ -0,0 +1,126 @@
+"""
+Planning overhead of hot queries in each DB_POOL_MODE configuration.
+
+Runs the same hot statements the API sends (an employee lookup and a page
+of one day's attendance) against a real database through engines built by
+app.database._create_engine(), so each mode uses exactly the pool and
+asyncpg options the app would:
+
+- external: the default pooler mode (NullPool, statement_cache_size=0),
+  so every request connects and Postgres parses and plans every call;
+- external + DB_PREPARED_STATEMENTS: pooled client connections with named
+  protocol-level prepared statements (needs PgBouncer 1.21+ with
+  max_prepared_statements > 0 when run through a pooler);
+- internal: the in-process pool with asyncpg's statement cache.
+
+Each call is timed like a request: check out a connection, run the
+statement, release the connection. It also reports the server's own
+planning and execution time for each statement (EXPLAIN ANALYZE), which
+is the part prepared statements save.
+
+Usage (against an initialized database, ideally with data loaded):
+    python -m benchmarks.prepared_statements [--dsn postgresql://...] [--pooler-dsn postgresql://...] [--calls 5000]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date
+from typing import Any, Dict, List, Tuple
+from unittest import mock
+
+import asyncpg
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.config import settings
+from app.database import _create_engine
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+
+
+def compile_statement(stmt) -> Tuple[str, List[Any]]:
+    """SQL text with $n placeholders and its positional parameters."""
+    compiled = stmt.compile(dialect=asyncpg_dialect())
+    return compiled.string, [compiled.params[name] for name in compiled.positiontup]
+
+
+# Settings overrides of each configuration, with the DSN option it runs against
+MODES: Dict[str, Tuple[Dict[str, Any], str]] = {
+    "external": ({"db_pool_mode": "external", "db_prepared_statements": False}, "pooler_dsn"),
+    "external + prepared": ({"db_pool_mode": "external", "db_prepared_statements": True}, "pooler_dsn"),
+    "internal": ({"db_pool_mode": "internal", "db_prepared_statements": False}, "dsn"),
+}
+
+
+def hot_statements(employee_id: str, day: date, limit: int):
+    lookup = select(Employee).where(Employee.employee_id == employee_id, Employee.deleted_at.is_(None))
+    page = (
+        select(Attendance.id, Attendance.employee_id, Attendance.date, Attendance.status, Attendance.created_at)
+        .where(Attendance.date == day)
+        .order_by(Attendance.id)
+        .limit(limit)
+    )
+    return {"employee lookup": lookup, "attendance page": page}
+
+
+async def time_calls(dsn: str, overrides: Dict[str, Any], stmt, calls: int) -> float:
+    """Mean latency of one checkout-and-execute through the mode's engine, in microseconds."""
+    with mock.patch.multiple(settings, **overrides):
+        engine = _create_engine(dsn)
+    try:
+        # Warm up the pool (and, when caching, the prepared statement)
+        for _ in range(50):
+            async with engine.connect() as conn:
+                (await conn.execute(stmt)).all()
+        started = time.perf_counter()
+        for _ in range(calls):
+            async with engine.connect() as conn:
+                (await conn.execute(stmt)).all()
+        return (time.perf_counter() - started) / calls * 1e6
+    finally:
+        await engine.dispose()
+
+
+async def server_times(dsn: str, sql: str, params: List[Any]) -> Tuple[float, float]:
+    """Planning and execution time Postgres reports for one run, in milliseconds."""
+    conn = await asyncpg.connect(dsn, statement_cache_size=0, server_settings={"jit": "off"})
+    try:
+        plan = await conn.fetchval(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {sql}", *params)
+        summary = json.loads(plan)[0]
+        return summary["Planning Time"], summary["Execution Time"]
+    finally:
+        await conn.close()
+
+
+async def run(dsns: Dict[str, str], calls: int, employee_id: str, day: date, limit: int):
+    print(f"{calls} calls per statement and mode, one at a time")
+    for name, stmt in hot_statements(employee_id, day, limit).items():
+        print(f"  {name}")
+        baseline = None
+        for mode, (overrides, dsn_option) in MODES.items():
+            mean = await time_calls(dsns[dsn_option], overrides, stmt, calls)
+            if baseline is None:
+                baseline = mean
+                print(f"    {mode:<20} {mean:8.1f} us/call")
+            else:
+                print(f"    {mode:<20} {mean:8.1f} us/call  ({1 - mean / baseline:.0%} less)")
+        planning, execution = await server_times(dsns["dsn"], *compile_statement(stmt))
+        print(f"    server: planning {planning:.3f} ms, execution {execution:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planning overhead with and without prepared statements")
+    parser.add_argument("--dsn", default=settings.database_url, help="Direct Postgres DSN (internal mode)")
+    parser.add_argument("--pooler-dsn", help="Pooler DSN for the external modes (default: --dsn)")
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--employee-id", default="EMP001")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--limit", type=int, default=settings.default_page_size)
+    args = parser.parse_args()
+    dsns = {"dsn": args.dsn, "pooler_dsn": args.pooler_dsn or args.dsn}
+    asyncio.run(run(dsns, args.calls, args.employee_id, args.date, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-row cost of serializing a list response, before and after the
+single-pass path.
+
+Before: each ORM row is validated into AttendanceResponse, FastAPI
+re-validates the list against response_model, and JSONResponse encodes it
+with json.dumps. After: rows are projected to dicts and encoded once by
+list_response(). No database is needed; rows are built in memory.
+
+Usage:
+    python -m benchmarks.serialization [--rows 50000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.attendance import Attendance, AttendanceResponse
+from app.utils.projection import project
+from app.utils.responses import list_response
+
+FIELDS = tuple(AttendanceResponse.model_fields)
+
+
+def make_rows(count: int) -> List[SimpleNamespace]:
+    start = date(2024, 1, 1)
+    created = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=f"att_{i:012x}",
+            employee_id=f"EMP{i % 500:03d}",
+            date=start + timedelta(days=i // 500),
+            status="Present" if i % 7 else "Absent",
+            created_at=created + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+def before(entities: List[Attendance]) -> bytes:
+    items = [AttendanceResponse.model_validate(entity) for entity in entities]
+    field = create_model_field(name="Response", type_=List[AttendanceResponse], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=items))
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def after(rows: List[SimpleNamespace]) -> bytes:
+    return list_response(AttendanceResponse, project(rows, FIELDS)).body
+
+
+def measure(path: Callable[[list], bytes], rows: list, repeat: int) -> float:
+    """Best wall time of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        path(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row cost of list response serialization")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    rows = make_rows(args.rows)
+    # The old services loaded ORM entities; building them is not timed
+    entities = [Attendance(**vars(row)) for row in rows]
+    assert before(entities[:100]) == after(rows[:100])
+    
+    print(f"{args.rows} attendance rows, best of {args.repeat}")
+    timings = {"before": measure(before, entities, args.repeat), "after": measure(after, rows, args.repeat)}
+    for name, seconds in timings.items():
+        print(f"  {name:<6} {seconds * 1000:9.1f} ms  {seconds / args.rows * 1e6:6.2f} us/row")
+    print(f"  speedup {timings['before'] / timings['after']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
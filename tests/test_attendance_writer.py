@@ -0,0 +1,78 @@
+"""Shutdown durability of the attendance write-behind queue."""
+import asyncio
+from datetime import date
+from unittest import mock
+
+from app.models.attendance import AttendanceBulkItemResult, AttendanceBulkResult, AttendanceCreate
+from app.services import attendance_writer as writer_module
+from app.services.attendance_writer import AttendanceWriteBehind
+
+
+class SlowBulkWriter:
+    """Stands in for mark_attendance_bulk(); each write takes a while."""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.written = []
+        self.started = asyncio.Event()
+    
+    async def __call__(self, db, records, marked_at=None):
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        self.written.extend(records)
+        return AttendanceBulkResult(
+            marked=len(records),
+            failed=0,
+            results=[
+                AttendanceBulkItemResult(employee_id=record.employee_id, date=record.date, marked=True)
+                for record in records
+            ]
+        )
+
+
+def _marks(count: int):
+    return [AttendanceCreate(employee_id=f"EMP{i:03d}", date=date(2024, 1, 2), status="Present") for i in range(count)]
+
+
+def _run_with(bulk: SlowBulkWriter, scenario):
+    with mock.patch.object(writer_module.attendance_service, "mark_attendance_bulk", bulk), \
+            mock.patch.object(writer_module.settings, "attendance_write_mode", "write_behind"):
+        asyncio.run(scenario())
+
+
+def test_stop_during_a_flush_writes_the_batch():
+    bulk = SlowBulkWriter(delay=0.2)
+    writer = AttendanceWriteBehind(max_pending=100, flush_size=5, flush_interval=60)
+    
+    async def scenario():
+        await writer.start()
+        for mark in _marks(5):
+            writer.submit(mark)
+        await bulk.started.wait()
+        # Shut down while the flusher is in the middle of the write
+        await writer.stop()
+    
+    _run_with(bulk, scenario)
+    assert sorted(record.employee_id for record in bulk.written) == [f"EMP{i:03d}" for i in range(5)]
+    assert writer.stats()["depth"] == 0
+
+
+def test_cancelled_flush_puts_the_batch_back():
+    bulk = SlowBulkWriter(delay=0.2)
+    writer = AttendanceWriteBehind(max_pending=100, flush_size=100, flush_interval=60)
+    
+    async def scenario():
+        for mark in _marks(3):
+            writer.submit(mark)
+        flush = asyncio.create_task(writer.flush())
+        await bulk.started.wait()
+        flush.cancel()
+        try:
+            await flush
+        except asyncio.CancelledError:
+            pass
+        assert writer.stats()["depth"] == 3
+        assert await writer.flush() == 3
+    
+    _run_with(bulk, scenario)
+    assert len(bulk.written) == 3
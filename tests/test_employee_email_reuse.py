@@ -0,0 +1,120 @@
+"""A deleted employee's email can be used again before the row is purged."""
+import asyncio
+from datetime import datetime, timezone
+from itertools import count
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.migrations import MIGRATIONS
+from app.models.employee import Employee, EmployeeCreate
+from app.services import employee_service as service_module
+from app.services.employee_service import EmployeeService
+from app.utils.cache import LRUCache
+from app.utils.exceptions import DuplicateEmployeeError
+
+
+def _email_uniqueness():
+    """(name, live rows only) for each unique rule on employees.email in the model."""
+    table = Employee.__table__
+    rules = [
+        (constraint.name or "employees_email_key", False)
+        for constraint in table.constraints
+        if constraint.__class__.__name__ == "UniqueConstraint" and list(constraint.columns.keys()) == ["email"]
+    ]
+    for index in table.indexes:
+        if index.unique and list(index.columns.keys()) == ["email"]:
+            where = index.dialect_options["postgresql"]["where"]
+            rules.append((index.name, where is not None and str(where) == "deleted_at IS NULL"))
+    return rules
+
+
+class FakeEmployeeSession:
+    """Holds employee rows and enforces the model's email uniqueness on commit."""
+    
+    def __init__(self):
+        self.rows = {}
+        self.pending = []
+    
+    def add(self, employee):
+        self.pending.append(employee)
+    
+    async def commit(self):
+        for employee in self.pending:
+            for name, live_only in _email_uniqueness():
+                if any(
+                    row.email == employee.email and (row.deleted_at is None or not live_only)
+                    for row in self.rows.values()
+                ):
+                    self.pending = []
+                    raise IntegrityError(
+                        "INSERT", {},
+                        Exception(f'duplicate key value violates unique constraint "{name}" Key (email)')
+                    )
+            self.rows[employee.employee_id] = employee
+        self.pending = []
+    
+    async def rollback(self):
+        self.pending = []
+    
+    async def refresh(self, employee):
+        employee.created_at = datetime.now(timezone.utc)
+    
+    async def execute(self, stmt):
+        # delete_employees(): tombstone the given live employees
+        employee_ids = stmt.compile(dialect=postgresql.dialect()).params["employee_ids"]
+        deleted = []
+        for employee_id in employee_ids:
+            row = self.rows.get(employee_id)
+            if row is not None and row.deleted_at is None:
+                row.deleted_at = datetime.now(timezone.utc)
+                deleted.append(employee_id)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: deleted))
+
+
+@pytest.fixture
+def service():
+    ids = count(1)
+    
+    async def allocate(db):
+        return f"EMP{next(ids):03d}"
+    
+    with mock.patch.object(service_module.employee_id_allocator, "allocate", allocate):
+        yield EmployeeService(LRUCache(100, 60))
+
+
+def test_deleted_employee_email_can_be_reused(service):
+    db = FakeEmployeeSession()
+    employee = EmployeeCreate(full_name="Ada Lovelace", email="ada@example.com", department="Engineering")
+    
+    async def scenario():
+        first = await service.create_employee(db, employee)
+        assert await service.delete_employees(db, [first.employee_id]) == [first.employee_id]
+        # The tombstoned row is still there, waiting for the purge
+        assert db.rows[first.employee_id].deleted_at is not None
+        return first, await service.create_employee(db, employee)
+    
+    first, second = asyncio.run(scenario())
+    assert second.email == first.email
+    assert second.employee_id != first.employee_id
+
+
+def test_live_employee_email_is_still_unique(service):
+    db = FakeEmployeeSession()
+    employee = EmployeeCreate(full_name="Ada Lovelace", email="ada@example.com", department="Engineering")
+    
+    async def scenario():
+        await service.create_employee(db, employee)
+        await service.create_employee(db, employee)
+    
+    with pytest.raises(DuplicateEmployeeError):
+        asyncio.run(scenario())
+
+
+def test_existing_databases_drop_the_full_email_constraint():
+    statements = dict(MIGRATIONS)["0013_employee_email_unique_live"]
+    assert any("uq_employees_email_live" in statement and "deleted_at IS NULL" in statement for statement in statements)
+    assert "ALTER TABLE employees DROP CONSTRAINT IF EXISTS employees_email_key" in statements
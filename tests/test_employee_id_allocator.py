@@ -0,0 +1,70 @@
+"""Concurrency tests for EmployeeIdAllocator against a stub sequence."""
+import asyncio
+import random
+from typing import List
+
+from app.services.employee_id_allocator import EmployeeIdAllocator
+
+
+class StubSequenceAllocator(EmployeeIdAllocator):
+    """Allocator drawing from an in-memory sequence that yields like a round-trip."""
+    
+    def __init__(self, block_size: int = 1):
+        super().__init__(block_size)
+        self.next_value = 1
+        self.draws = 0
+    
+    async def _draw(self, db, count: int) -> List[int]:
+        self.draws += 1
+        # Let other tasks interleave, as they would while the query is in flight
+        await asyncio.sleep(random.random() / 1000)
+        values = list(range(self.next_value, self.next_value + count))
+        self.next_value += count
+        await asyncio.sleep(0)
+        return values
+
+
+async def _gather(*coroutines):
+    return await asyncio.gather(*coroutines)
+
+
+def test_parallel_allocate_never_repeats_an_id():
+    allocator = StubSequenceAllocator(block_size=1)
+    ids = asyncio.run(_gather(*(allocator.allocate(None) for _ in range(500))))
+    
+    assert len(set(ids)) == 500
+    assert allocator.draws == 500
+
+
+def test_parallel_allocate_with_blocks_shares_reservations():
+    allocator = StubSequenceAllocator(block_size=25)
+    ids = asyncio.run(_gather(*(allocator.allocate(None) for _ in range(500))))
+    
+    assert len(set(ids)) == 500
+    assert allocator.draws == 500 // 25
+
+
+def test_parallel_mixed_allocations_never_repeat_an_id():
+    allocator = StubSequenceAllocator(block_size=10)
+    random.seed(7)
+    sizes = [random.randint(1, 40) for _ in range(200)]
+    
+    async def run():
+        singles = [allocator.allocate(None) for _ in range(300)]
+        blocks = [allocator.allocate_block(None, size) for size in sizes]
+        return await asyncio.gather(*singles, *blocks)
+    
+    results = asyncio.run(run())
+    singles, blocks = results[:300], results[300:]
+    allocated = list(singles) + [employee_id for block in blocks for employee_id in block]
+    
+    assert len(allocated) == 300 + sum(sizes)
+    assert len(set(allocated)) == len(allocated)
+    for size, block in zip(sizes, blocks):
+        assert len(block) == size
+        assert block == sorted(block, key=lambda employee_id: int(employee_id[3:]))
+
+
+def test_format_id_pads_to_three_digits():
+    assert EmployeeIdAllocator.format_id(7) == "EMP007"
+    assert EmployeeIdAllocator.format_id(1234) == "EMP1234"
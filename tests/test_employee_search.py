@@ -0,0 +1,39 @@
+"""Employee search without pg_trgm and without the in-process index."""
+import asyncio
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import employee_service as service_module
+from app.services.employee_search import employee_search_index
+from app.utils.pagination import Page
+
+
+def _search_sql(selected: bool) -> str:
+    captured = {}
+    
+    async def fetch_page(db, stmt, keys, limit, cursor):
+        captured["stmt"] = stmt
+        return Page([])
+    
+    with mock.patch.object(service_module, "fetch_page", fetch_page), \
+            mock.patch.multiple(employee_search_index, enabled=False, selected=selected):
+        asyncio.run(service_module.employee_service.search_employees(None, "ada_l", 10))
+    compiled = captured["stmt"].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    # The pyformat paramstyle doubles literal percent signs
+    return str(compiled).replace("%%", "%")
+
+
+def test_search_uses_trigrams_when_postgres_was_chosen():
+    sql = _search_sql(selected=False)
+    assert "word_similarity" in sql
+    assert "<%" in sql
+
+
+@pytest.mark.parametrize("field", ["full_name", "email", "department"])
+def test_unloaded_memory_index_falls_back_to_substring_matching(field):
+    sql = _search_sql(selected=True)
+    assert "word_similarity" not in sql
+    assert "<%" not in sql
+    assert f"employees.{field} ILIKE '%ada/_l%' ESCAPE '/'" in sql
@@ -0,0 +1,41 @@
+"""Checkout statistics of InstrumentedQueuePool."""
+from unittest import mock
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from app.database import InstrumentedQueuePool, pool_stats
+
+
+@pytest.fixture
+def pool():
+    pool_stats.reset()
+    yield InstrumentedQueuePool(creator=mock.Mock(), pool_size=1, max_overflow=0, timeout=0.01)
+    pool_stats.reset()
+
+
+def test_checkout_wait_is_recorded(pool):
+    with mock.patch.object(QueuePool, "_do_get", return_value="connection"):
+        assert pool._do_get() == "connection"
+    
+    assert pool_stats.checkouts == 1
+    assert pool_stats.timeouts == 0
+
+
+def test_pool_timeout_is_counted(pool):
+    with mock.patch.object(QueuePool, "_do_get", side_effect=exc.TimeoutError("pool exhausted")):
+        with pytest.raises(exc.TimeoutError):
+            pool._do_get()
+    
+    assert pool_stats.timeouts == 1
+    assert pool_stats.checkouts == 0
+
+
+def test_connection_failure_is_not_a_timeout(pool):
+    with mock.patch.object(QueuePool, "_do_get", side_effect=OSError("connection refused")):
+        with pytest.raises(OSError):
+            pool._do_get()
+    
+    assert pool_stats.timeouts == 0
+    assert pool_stats.checkouts == 0
@@ -0,0 +1,235 @@
+"""Round-trips per request through _session_scope, against a stub asyncpg connection."""
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from sqlalchemy import Column, Integer, String, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app import database
+from app.database import _session_scope
+
+Base = declarative_base()
+
+
+class Widget(Base):
+    __tablename__ = "widgets"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(50))
+
+
+# Answers to the queries SQLAlchemy runs when it first connects
+_HANDSHAKE = {
+    "select pg_catalog.version()": "PostgreSQL 16.0 on x86_64-pc-linux-gnu",
+    "select current_schema()": "public",
+    "show standard_conforming_strings": "on",
+    "show transaction isolation level": "read committed",
+}
+
+
+class StubPrepared:
+    def __init__(self, connection, sql):
+        self.connection = connection
+        self.sql = sql
+    
+    def get_attributes(self):
+        if self.sql.strip() in _HANDSHAKE:
+            names = ("value",)
+        elif self.sql.lower().startswith("select"):
+            names = ("id", "name")
+        else:
+            return ()
+        return tuple(SimpleNamespace(name=name, type=SimpleNamespace(oid=25)) for name in names)
+    
+    async def fetch(self, *params):
+        self.connection.log.append(self.sql)
+        answer = _HANDSHAKE.get(self.sql.strip())
+        if answer is not None:
+            return [(answer,)]
+        if self.sql.lower().startswith("select"):
+            return [(1, "widget")]
+        return []
+    
+    def get_statusmsg(self):
+        return "INSERT 0 1" if self.sql.lower().startswith("insert") else "SELECT 1"
+
+
+class StubTransaction:
+    def __init__(self, connection, readonly=False, deferrable=False, **kwargs):
+        self.connection = connection
+        self.modes = [mode for mode, on in (("READ ONLY", readonly), ("DEFERRABLE", deferrable)) if on]
+    
+    async def start(self):
+        self.connection.log.append(" ".join(["BEGIN", *self.modes]))
+    
+    async def commit(self):
+        self.connection.log.append("COMMIT")
+    
+    async def rollback(self):
+        self.connection.log.append("ROLLBACK")
+
+
+class StubConnection:
+    """The parts of asyncpg.Connection SQLAlchemy's asyncpg dialect uses."""
+    
+    def __init__(self):
+        self.log = []
+        self.closed = False
+    
+    async def prepare(self, sql, name=None):
+        return StubPrepared(self, sql)
+    
+    def transaction(self, **kwargs):
+        return StubTransaction(self, **kwargs)
+    
+    async def set_type_codec(self, *args, **kwargs):
+        pass
+    
+    async def reload_schema_state(self):
+        pass
+    
+    async def fetchrow(self, sql):
+        return None
+    
+    def is_closed(self):
+        return self.closed
+    
+    async def close(self, timeout=None):
+        self.closed = True
+    
+    def terminate(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stub():
+    connections = []
+    
+    async def connect():
+        connection = StubConnection()
+        connections.append(connection)
+        return connection
+    
+    engine = create_async_engine("postgresql+asyncpg://stub/stub", async_creator=connect)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    # Connect once so the dialect's first-connect queries are not counted
+    async def warm_up():
+        async with engine.connect():
+            pass
+    asyncio.run(warm_up())
+    connections[0].log.clear()
+    
+    yield SimpleNamespace(engine=engine, maker=maker, connections=connections)
+    asyncio.run(engine.dispose())
+
+
+def _round_trips(stub):
+    return [entry for connection in stub.connections for entry in connection.log]
+
+
+def _run(stub, handler, scope=_session_scope, maker=None):
+    async def request():
+        async with scope(maker or stub.maker) as session:
+            await handler(session)
+    asyncio.run(request())
+    return _round_trips(stub)
+
+
+@asynccontextmanager
+async def _baseline_scope(session_maker):
+    """get_db() as it was before round-trips were trimmed: always COMMIT."""
+    async with session_maker() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+async def _read_widgets(session):
+    await session.execute(select(Widget.id, Widget.name))
+
+
+SELECT_WIDGETS = "SELECT widgets.id, widgets.name \nFROM widgets"
+
+
+@pytest.mark.parametrize("scope, expected", [
+    (_baseline_scope, ["BEGIN", SELECT_WIDGETS, "COMMIT"]),
+    # The pool's reset on checkin ends the transaction; no COMMIT is sent
+    (_session_scope, ["BEGIN", SELECT_WIDGETS, "ROLLBACK"]),
+])
+def test_read_only_request_through_get_db(stub, scope, expected):
+    assert _run(stub, _read_widgets, scope=scope) == expected
+
+
+@pytest.mark.parametrize("read_mode, expected", [
+    ("autocommit", [SELECT_WIDGETS]),
+    ("read_only", ["BEGIN READ ONLY DEFERRABLE", SELECT_WIDGETS, "ROLLBACK"]),
+])
+def test_read_only_request_through_get_read_db(stub, read_mode, expected):
+    # get_read_db()'s RoutingSession, with the stub as the primary and no replicas
+    with mock.patch.object(database.settings, "db_read_mode", read_mode):
+        read_engine = database._read_engine(stub.engine)
+    with mock.patch.object(database, "engine", stub.engine), \
+            mock.patch.object(database, "primary_read_engine", read_engine), \
+            mock.patch.object(database.replicas, "choose", return_value=None):
+        assert _run(stub, _read_widgets, maker=database.read_session_maker) == expected
+
+
+def test_read_request_that_writes_moves_to_the_primary(stub):
+    async def handler(session):
+        await session.execute(select(Widget.id, Widget.name))
+        session.add(Widget(id=3, name="widget"))
+    
+    with mock.patch.object(database.settings, "db_read_mode", "autocommit"):
+        read_engine = database._read_engine(stub.engine)
+    with mock.patch.object(database, "engine", stub.engine), \
+            mock.patch.object(database, "primary_read_engine", read_engine), \
+            mock.patch.object(database.replicas, "choose", return_value=None):
+        trips = _run(stub, handler, maker=database.read_session_maker)
+    assert trips[0] == SELECT_WIDGETS
+    assert trips[1:] == ["BEGIN", trips[2], "COMMIT"] and trips[2].startswith("INSERT INTO widgets")
+
+
+def test_request_without_queries_sends_nothing(stub):
+    async def handler(session):
+        pass
+    
+    assert _run(stub, handler) == []
+
+
+def test_added_object_is_committed_without_explicit_flush(stub):
+    async def handler(session):
+        session.add(Widget(id=1, name="widget"))
+    
+    trips = _run(stub, handler)
+    assert [trip for trip in trips if trip in ("BEGIN", "COMMIT")] == ["BEGIN", "COMMIT"]
+    assert sum(trip.lower().startswith("insert") for trip in trips) == 1
+
+
+def test_request_that_committed_itself_is_not_committed_again(stub):
+    async def handler(session):
+        session.add(Widget(id=2, name="widget"))
+        await session.commit()
+    
+    trips = _run(stub, handler)
+    assert trips.count("COMMIT") == 1
+
+
+def test_failed_request_rolls_back_once(stub):
+    async def handler(session):
+        await session.execute(select(Widget.id, Widget.name))
+        raise RuntimeError("boom")
+    
+    with pytest.raises(RuntimeError):
+        _run(stub, handler)
+    assert _round_trips(stub).count("ROLLBACK") == 1
+    assert "COMMIT" not in _round_trips(stub)